@@ -2,6 +2,7 @@
 Data feeds including Abstract Base Class and the concrete implementations
 """
 
+import functools
 import logging
 import numpy as np
 import os
@@ -134,6 +135,28 @@ class DataFeed(metaclass=ABCMeta):
             return bar
 
 
+@functools.lru_cache(maxsize=64)
+def _read_csv_file(filename, mtime_ns, size):
+    """
+    Read and parse a CsvDataFeed file. The parsed DataFrame is cached by the filename, file modification time and file
+    size so every CsvDataFeed reading the same unchanged file only parses it once. The cache is bounded so the least recently
+    read files, including the older versions of changed files, are dropped. The returned DataFrame is shared, so copy it
+    before changing it.
+
+    :param filename: full path filename
+    :param mtime_ns: modification time of the file in nanoseconds, part of the cache key so a changed file is parsed
+        again
+    :param size: size of the file in bytes, also part of the cache key so a file rewritten within the resolution of
+        the modification time, or with the modification time restored, is parsed again
+    :return: pandas DataFrame
+    """
+    log.info(f'CsvDataFeed: reading file: {filename}')
+    data = pdutils.read_csv_time_series(filename, 'datetime', pdutils.strict_parser)
+    data = data.replace(np.nan, None)
+    data.index.name = 'datetime'
+    return data
+
+
 class CsvDataFeed(DataFeed):
     def __init__(self, directory, source_name='csv', time_zone=None):
         """
@@ -157,8 +180,6 @@ class CsvDataFeed(DataFeed):
         :return: nothing
         """
         filename = os.path.join(self._directory, symbol + '_' + product_type + '_' + frequency + '.csv')
-        log.info(f'CsvDataFeed: reading file: {filename}')
-        data = pdutils.read_csv_time_series(filename, 'datetime', pdutils.strict_parser)
-        data = data.replace(np.nan, None)
-        data.index.name = 'datetime'
+        stat = os.stat(filename)
+        data = _read_csv_file(filename, stat.st_mtime_ns, stat.st_size).copy()
         self.add_data(data, product_type, symbol, frequency)
@@ -34,6 +34,7 @@ class MarketDataManager:
         self._start_live_bartime = None
         self._current_bartime = None
         self._bar_data = {}
+        self._view_series = {}  # {(product_type, symbol, frequency, column, offset): (DataFrame, ViewSeries)}
 
     @property
     def time_zone(self):
@@ -294,6 +295,27 @@ class MarketDataManager:
         """
         return self._bar_data[product_type][frequency][symbol]
 
+    def view_series(self, product_type, symbol, frequency, column, offset=1):
+        """
+        Returns a ViewSeries on a column of the underlying data structure. The ViewSeries is cached so all callers
+        asking for the same column share one object, and is only created again if the underlying DataFrame for the
+        symbol has been replaced. Be careful not to modify or will corrupt the object.
+
+        :param product_type: product type
+        :param symbol: symbol
+        :param frequency: frequency
+        :param column: column name
+        :param offset: offset of the ViewSeries
+        :return: ViewSeries
+        """
+        bars = self._bar_data[product_type][frequency][symbol]
+        key = (product_type, symbol, frequency, column, offset)
+        cached = self._view_series.get(key)
+        if cached is None or cached[0] is not bars:
+            cached = (bars, rc.ViewSeries.from_dataframe(bars, column, offset=offset))
+            self._view_series[key] = cached
+        return cached[1]
+
     def bars(self, product_type, symbol, frequency, start_datetime=None, end_datetime=None):
         """
         For a given symbol return a raccoon DataFrame of the bars
@@ -46,14 +46,27 @@ def bartimes(markets, frequency, start_datetime, end_datetime, include_open=True
 
     # if default_close for 1D data then overwrite actual early close time with default close
     if default_close & (frequency == "1D"):
-        if len(markets) > 1:
-            raise RuntimeError("default_close cannot handle multiple product types")
-        market = mcal.get_calendar(markets[0])
-        datetimes = pdutils.from_daily(datetimes, market.regular_market_times["market_close"][-1][-1], market.tz)
+        datetimes = apply_default_close(datetimes, markets)
 
     return datetimes
 
 
+def apply_default_close(datetimes, markets):
+    """
+    Overwrite the times of 1D datetimes with the default close time of the market, replacing any early close times
+    from the pandas_market_calendars. Any cut of the datetimes by time must be done before this.
+
+    :param datetimes: DatetimeIndex of 1D bar times
+    :param markets: single or list of markets (ie: NYSE, stock, CME), only one market is allowed
+    :return: DatetimeIndex
+    """
+    markets = markets if isinstance(markets, list) else [markets]
+    if len(markets) > 1:
+        raise RuntimeError("default_close cannot handle multiple product types")
+    market = mcal.get_calendar(markets[0])
+    return pdutils.from_daily(datetimes, market.regular_market_times["market_close"][-1][-1], market.tz)
+
+
 def align_datetimes(
         x: pd.DataFrame | pd.Series,
         markets: str | list[str],
@@ -2,6 +2,7 @@
 unit tests for CsvDataFeed classes
 """
 
+import os
 from pathlib import Path
 
 import pandas as pd
@@ -43,6 +44,41 @@ def test_load_data():
     assert max(actual.index) == pd.Timestamp('2000-01-02 11:00:00', tz=NYC)
 
 
+def test_load_data_cached():
+    data_feed._read_csv_file.cache_clear()
+    csvdf = data_feed.CsvDataFeed(f'{inst_dir}/csv_data_feed')
+    csvdf.load_data('stock', 'test.sym.1', '1min')
+    assert data_feed._read_csv_file.cache_info().misses == 1
+
+    # a second feed on the same file uses the parsed file
+    csvdf2 = data_feed.CsvDataFeed(f'{inst_dir}/csv_data_feed')
+    csvdf2.load_data('stock', 'test.sym.1', '1min')
+    assert data_feed._read_csv_file.cache_info().misses == 1
+    assert data_feed._read_csv_file.cache_info().hits == 1
+
+    actual = csvdf2._bar_data['stock']['1min']['test.sym.1']
+    assert sum(actual['close'].to_list()) == 20930.0
+    assert actual is not csvdf._bar_data['stock']['1min']['test.sym.1']
+
+
+def test_load_data_cache_rewritten_file(tmp_path):
+    # a file rewritten with the modification time restored is parsed again because the size changed
+    source = Path(inst_dir) / 'csv_data_feed' / 'test.sym.1_stock_1min.csv'
+    filename = tmp_path / 'test.sym.1_stock_1min.csv'
+    filename.write_text(source.read_text())
+    mtime_ns = filename.stat().st_mtime_ns
+    csvdf = data_feed.CsvDataFeed(str(tmp_path))
+    csvdf.load_data('stock', 'test.sym.1', '1min')
+    assert sum(csvdf._bar_data['stock']['1min']['test.sym.1']['close'].to_list()) == 20930.0
+
+    lines = source.read_text().splitlines()
+    filename.write_text('\n'.join(lines[:2]) + '\n')
+    os.utime(filename, ns=(mtime_ns, mtime_ns))
+    csvdf = data_feed.CsvDataFeed(str(tmp_path))
+    csvdf.load_data('stock', 'test.sym.1', '1min')
+    assert csvdf._bar_data['stock']['1min']['test.sym.1']['close'].to_list() == [100.5]
+
+
 def test_bars():
     csvdf = data_feed.CsvDataFeed(f'{inst_dir}/csv_data_feed')
 
@@ -170,6 +170,12 @@ def test_load_history_1min():
     # test view is a view
     assert mdm.bar_data['stock']['1min']['test.sym.1'] is mdm.view('stock', 'test.sym.1', '1min')
 
+    # view_series is cached and a view
+    close = mdm.view_series('stock', 'test.sym.1', '1min', 'close')
+    assert close is mdm.view_series('stock', 'test.sym.1', '1min', 'close')
+    assert close is not mdm.view_series('stock', 'test.sym.1', '1min', 'open')
+    assert close.data is mdm.view('stock', 'test.sym.1', '1min').get_entire_column('close', as_list=True)
+
     # add some more live data
     mdm.bartime = pd.Timestamp('2000-01-01 10:11:00')
     mdm.update('stock', '1min')
@@ -8,6 +8,7 @@ import pandas as pd
 import pandas_market_calendars as mcal
 from pandas.tseries.holiday import USFederalHolidayCalendar
 from pandas.tseries.offsets import CustomBusinessDay
+import sqlalchemy
 from sqlalchemy import MetaData, Table, Column, Integer, String, Engine
 
 import database.utils as dbutils
@@ -47,6 +48,24 @@ def delete_db(host: str, product_type: str) -> None:
     dbutils.delete_db(host, product_type)
 
 
+def exists(host: str, product_type: str) -> bool:
+    """
+    Test if the symbol DB for the product type exists on the host and has the symbol table created
+
+    :param host: host machine that has the database
+    :param product_type: product type of the symbol DB
+    :return: True if the DB and symbol table exist, False if not
+    """
+    if not dbutils.database_filename(product_type, host).exists():
+        return False
+    eng = engine(host, product_type)
+    sql = sqlalchemy.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'symbol'")
+    with eng.begin() as conn:
+        result = conn.execute(sql).fetchall()
+    eng.dispose()
+    return len(result) > 0
+
+
 @functools.lru_cache()
 def holidays(product_type):
     """
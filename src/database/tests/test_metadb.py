@@ -88,3 +88,12 @@ def test_prior_end_of_day():
 
     with pytest.raises(ValueError):
         metadb.prior_end_of_day(None, None, '2016-06-24', 1)
+
+
+def test_exists():
+    metadb.delete_db('temp', 'stock')
+    assert metadb.exists('temp', 'stock') is False
+    metadb.create_db('temp', 'stock')
+    assert metadb.exists('temp', 'stock') is True
+    metadb.delete_db('temp', 'stock')
+    assert metadb.exists('temp', 'stock') is False
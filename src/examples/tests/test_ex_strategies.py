@@ -3,14 +3,17 @@ Unit / end-to-end testing using examples strategies
 """
 
 import collections
+import copy
+import functools
+import os
 from collections import namedtuple
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pytest
 import raccoon as rc
 from pytest import approx
-from raccoon.utils import assert_frame_equal
 
 from database import tapdb, strategydb, metadb
 from database import utils as dbutils
@@ -22,13 +25,133 @@ import puma.runner as runner
 
 from utils.datetime import NYC, default_time_zone
 from puma.utils import assert_positions_df
-from utils.collections import aggregate_rc
+from utils.collections import aggregate_rc_fast
+import utils.file as futils
+
+# Object bridge passed to the strategies
+_Objects = namedtuple('OB', 'order_manager, market_data_manager, position_manager')
+
+# State of the replaces test environment captured after each bar is processed
+_ReplacesSnapshot = namedtuple('ReplacesSnapshot', 'open_df, closed_df, new_trades, positions')
+
+# State of the intents test environment captured after each bar is processed
+_IntentsSnapshot = namedtuple('IntentsSnapshot', 'open_df, closed_df, strategy, values')
 
 # Global variables
 inst_dir = Path()
 csv_data_dir = Path()
 
 
+def _setup_test_logging():
+    """
+    Turn on logging to the file in the RUNNER_TEST_LOG environment variable. If it is not set then nothing is logged,
+    which keeps the logging overhead out of the normal test runs.
+
+    :return: nothing
+    """
+    if os.environ.get('RUNNER_TEST_LOG'):
+        futils.setup_logging(console=False, filename=os.environ['RUNNER_TEST_LOG'], buffer_capacity=1024)
+
+
+def _column_array(values):
+    """
+    Convert a column list to a numpy array. Columns that are entirely numeric become float arrays, everything else is
+    a 1-d object array so lists, tuples and dicts are kept as single elements.
+
+    :param values: list of column values
+    :return: numpy array
+    """
+    if all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in values):
+        return np.asarray(values, dtype=float)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _afe(actual, expected):
+    """
+    Fast replacement for raccoon assert_frame_equal. The index and columns are compared directly and then each column
+    is compared as a plain list. Only if the lists are not equal are the columns compared as numpy arrays, with a
+    relative tolerance for numeric columns, which also gives the report of the differences.
+
+    :param actual: actual raccoon DataFrame
+    :param expected: expected raccoon DataFrame
+    :return: nothing
+    """
+    assert list(actual.columns) == list(expected.columns)
+    assert list(actual.index) == list(expected.index)
+    assert actual.index_name == expected.index_name
+    assert actual.sort == expected.sort
+    for column in expected.columns:
+        _assert_column(column, actual.get_entire_column(column, as_list=True),
+                       expected.get_entire_column(column, as_list=True))
+
+
+def _assert_column(column, actual_list, expected_list):
+    """
+    Assert a column list equals the expected list. If the lists are not equal then they are compared as numpy arrays,
+    with a relative tolerance for numeric columns, which also gives the report of the differences.
+
+    :param column: column name for the error message
+    :param actual_list: list of actual values
+    :param expected_list: list of expected values
+    :return: nothing
+    """
+    if actual_list == expected_list:
+        return
+    actual_values = _column_array(actual_list)
+    expected_values = _column_array(expected_list)
+    if actual_values.dtype.kind == 'f' and expected_values.dtype.kind == 'f':
+        np.testing.assert_allclose(actual_values, expected_values, rtol=1e-9, err_msg=f'column: {column}')
+    else:
+        np.testing.assert_array_equal(actual_values, expected_values, err_msg=f'column: {column}')
+
+
+def _assert_open_orders(actual, expected):
+    """
+    Assert the open orders match the expected columns. The expected open orders are only one or two rows, so the
+    columns are compared directly to the lists in the dict rather than building an expected DataFrame and comparing
+    the index and properties that do not matter to the tests.
+
+    :param actual: raccoon DataFrame of the open orders
+    :param expected: dict of column name to list of expected values
+    :return: nothing
+    """
+    for column, values in expected.items():
+        _assert_column(column, actual.get_entire_column(column, as_list=True), values)
+
+
+# numeric columns of the expected closed orders files, declared so read_csv does not need to infer them
+_CLOSED_ORDERS_DTYPES = {'commission': 'float64', 'fill_price': 'float64', 'fill_quantity': 'float64',
+                         'quantity': 'float64'}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_expected_closed(path):
+    """
+    Parse an expected closed orders CSV file once, with NaN replaced by None. The columns are converted straight from
+    the numpy arrays rather than going through a dict of lists.
+
+    :param path: full path to the file as a string
+    :return: tuple of (column name, tuple of values)
+    """
+    file_data = pd.read_csv(path, index_col=[0], dtype=_CLOSED_ORDERS_DTYPES, float_precision='high')
+    file_data = file_data.astype(object).where(file_data.notna(), None)
+    return tuple((c, tuple(file_data[c].to_numpy().tolist())) for c in file_data.columns)
+
+
+def _read_expected_closed(filename):
+    """
+    Expected closed orders raccoon DataFrame from a CSV file in the inst directory. The file is only parsed the first
+    time, after that a new DataFrame is built from the cached values so callers are free to modify it.
+
+    :param filename: file name in the inst directory
+    :return: raccoon DataFrame
+    """
+    columns = _load_expected_closed(str(inst_dir / filename))
+    return rc.DataFrame({c: list(values) for c, values in columns}, columns=[c for c, _ in columns])
+
+
 def setup_module():
     global inst_dir, csv_data_dir
     inst_dir = Path(__file__).parent / "inst"
@@ -42,16 +165,17 @@ def setup_module():
     temp_tapdb = tapdb.engine(host="temp")
     temp_strategydb = strategydb.engine(host="temp")
 
-    # attach the stock symbolDB
-    metadb.delete_db("temp", "stock")
-    metadb.create_db("temp", "stock")
+    # attach the stock symbolDB, only recreate it if it does not already exist
+    if not metadb.exists("temp", "stock"):
+        metadb.delete_db("temp", "stock")
+        metadb.create_db("temp", "stock")
     seng = metadb.engine("temp", "stock")
     dbutils.attach_schema(temp_tapdb, "stock", "temp")
 
     # setup default data
-    dbutils.upload_name(seng, "symbol", "test.sym.9")
-    dbutils.upload_name(seng, "symbol", "test.sym.10")
-    dbutils.upload_name(seng, "symbol", "test.sym.11")
+    for symbol in ["test.sym.9", "test.sym.10", "test.sym.11"]:
+        if not dbutils.name_exists(seng, "symbol", symbol):
+            dbutils.upload_name(seng, "symbol", symbol)
     strategydb.insert_strategy(temp_strategydb, "test_01", "examples.strategy_examples", "UnitTest_01")
     strategydb.insert_strategy(temp_strategydb, "test_02", "examples.strategy_examples", "UnitTest_02")
     strategydb.insert_strategy(temp_strategydb, "test_03", "examples.strategy_examples", "UnitTest_03")
@@ -64,257 +188,210 @@ def setup_module():
     temp_strategydb.dispose()
 
 
-def test_event_loop_w_replaces():
-    # setup logging
-    # futils.setup_logging()
-
-    # setup all the environment objects
-    oms = tw.OrderManager('unit_test', None)
-    tap = tw.PositionManager('pm_test', oms, None)
-    port = tw.Portfolio('port_test', oms, tap)
-    risk = tw.Risk(oms)
-
-    # Paper broker and paper exchange
-    exchange = tw.PaperExchange()
-    broker = tw.PaperBroker('broker_01', oms, exchange)
-
-    # Setup market data
-    datafeed = datalib.CsvDataFeed(csv_data_dir)
-    hdm = datalib.HistoricalDataManager(datafeed, host="temp")
-    ldm = datalib.LiveDataManager(datafeed, host="temp")
-    mdm = datalib.MarketDataManager(hdm, ldm)
-
-    # Now attach and link the objects to each other
-    tap.setup_market_data(mdm)
-    port.setup_market_data(mdm)
-
-    # set up the strategy
-    objects = namedtuple('OB', 'order_manager, market_data_manager, position_manager')(oms, mdm, tap)
-    strat = examples.strategy_examples.UnitTest_02('test_02', objects)
-
-    # Attached the strategy to the Portfolio
-    port.add_strategy(strat)
-
-    # Add the symbols to the strategy
-    strat.add_symbols([('stock', 'test.sym.9', '1min')])
-    strat.add_symbols([('stock', 'test.sym.10', '1min')])
-
-    # Set the strategy parameters
-    strat.set_parameters({'start_bar': 1})
-
-    # Initialize the event loop
-    event_loop = tw.EventProcessor([strat], [port], risk, oms, tap, broker, mdm, exchange)
-
-    # start the strategies
-    strat.start()
-
-    # put the market in open state
-    oms.market_state('stock', True)
-
-    # test that processing fills with nothing to fill just passes
-    event_loop.process_fills()
-
-    # test that processing cancels with nothing just passes
-    event_loop.process_cancels()
-
-    # this bar will enter the orders from the strategy
-    mdm.bartime = pd.Timestamp('2010-01-04 09:30:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.10'], 'state': ['SENT'], 'buy_sell': ['sell'],
-                                  'quantity': [50],
-                                  'details': [{'price': 44.8}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    assert len(oms.closed_orders_df()) == 0
-
-    # this bar will enter the orders from the strategy
-    mdm.bartime = pd.Timestamp('2010-01-04 09:31:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.10'], 'state': ['LIVE'], 'buy_sell': ['sell'],
-                                  'quantity': [50],
-                                  'details': [{'price': 44.8}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    assert len(oms.closed_orders_df()) == 0
-
-    # process the next bar which will create some orders
-    mdm.bartime = pd.Timestamp('2010-01-04 09:32:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9', 'test.sym.10'], 'state': ['SENT', 'SENT'],
-                                  'buy_sell': ['buy', 'sell'], 'quantity': [100, 100],
-                                  'details': [{'price': 50.6}, {'price': 45.5}], 'closed': [False, False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.10'], 'state': ['FILLED'],
-                                    'buy_sell': ['sell'],
-                                    'fill_quantity': [50],
-                                    'fill_price': [44.8],
-                                    'closed': [True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test PnL
-    assert len(tap.new_trades) == 1
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'current_position') == approx(-50)
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'net_pnl') == approx(50 * (44.8 - 43.93) - 50 * 0.01)
-
-    # process the next bar
-    mdm.bartime = pd.Timestamp('2010-01-04 09:33:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9', 'test.sym.10', 'test.sym.9'],
-                                  'state': ['REPLACE_SENT', 'REPLACE_SENT', 'SENT'],
-                                  'buy_sell': ['buy', 'sell', 'buy'], 'quantity': [100, 75, 100],
-                                  'details': [{'price': 50.8}, {'price': 45.3}, {'price': 51.0}],
-                                  'closed': [False, False, False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.10'], 'state': ['FILLED'],
-                                    'buy_sell': ['sell'],
-                                    'fill_quantity': [50],
-                                    'fill_price': [44.8],
-                                    'closed': [True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test PnL
-    assert len(tap.new_trades) == 1
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'current_position') == approx(-50)
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'net_pnl') == approx(50 * (44.8 - 44.43) - 50 * 0.01)
-
-    # process the next bar
-    mdm.bartime = pd.Timestamp('2010-01-04 09:34:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9', 'test.sym.9'],
-                                  'state': ['REPLACE_SENT', 'REPLACE_SENT'],
-                                  'buy_sell': ['buy', 'buy'], 'quantity': [100, 50],
-                                  'details': [{'price': 51.7}, {'price': 51.0}], 'closed': [False, False],
-                                  'booked': [None, True], 'fill_quantity': [None, 54], 'fill_price': [None, 51.0]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.10', 'test.sym.10'], 'state': ['FILLED', 'FILLED'],
-                                    'buy_sell': ['sell', 'sell'], 'fill_quantity': [50, 75],
-                                    'fill_price': [44.8, 45.3], 'closed': [True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test PnL
-    assert len(tap.new_trades) == 3
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'current_position') == approx(54)
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'net_pnl') == approx(54 * (51.92 - 51.0) - 54 * 0.01)
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'current_position') == approx(-125)
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'net_pnl') == \
-           approx(50 * (44.8 - 44.82) + 75 * (45.3 - 44.82) - 125 * 0.01)
-
-    # process the next bar
-    mdm.bartime = pd.Timestamp('2010-01-04 09:35:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [100], 'details': [{'price': 51.75}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.10', 'test.sym.10', 'test.sym.9'],
-                                    'state': ['FILLED', 'FILLED', 'FILLED'],
-                                    'buy_sell': ['sell', 'sell', 'buy'], 'fill_quantity': [50, 75, 54],
-                                    'fill_price': [44.8, 45.3, 51.0], 'closed': [True, True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test PnL
-    assert len(tap.new_trades) == 3
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'current_position') == approx(54)
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'net_pnl') == approx(54 * (51.84 - 51.0) - 54 * 0.01)
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'current_position') == approx(-125)
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'net_pnl') == \
-           approx(50 * (44.8 - 44.94) + 75 * (45.3 - 44.94) - 125 * 0.01)
-
-    # process the next bar
-    mdm.bartime = pd.Timestamp('2010-01-04 09:36:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9', 'test.sym.10'], 'state': ['REPLACE_SENT', 'SENT'],
-                                  'buy_sell': ['buy', 'sell'], 'quantity': [80, 50],
-                                  'details': [{'price': 51.5}, {'price': 44.5}], 'closed': [False, False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.10', 'test.sym.10', 'test.sym.9'],
-                                    'state': ['FILLED', 'FILLED', 'FILLED'],
-                                    'buy_sell': ['sell', 'sell', 'buy'], 'fill_quantity': [50, 75, 54],
-                                    'fill_price': [44.8, 45.3, 51.0], 'closed': [True, True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test booked orders
-    assert len(tap.new_trades) == 4
-
-    # test PnL
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'current_position') == approx(114)
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'net_pnl') == \
-           approx(60 * (51.83 - 51.75) + 54 * (51.83 - 51.0) - 114 * 0.01)
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'current_position') == approx(-125)
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'net_pnl') == \
-           approx(50 * (44.8 - 44.25) + 75 * (45.3 - 44.25) - 125 * 0.01)
-
-    # process the next bar
-    mdm.bartime = pd.Timestamp('2010-01-04 09:37:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '1min')
+# Expected state after each bar of the event loop with replaces test. The steps are run in order on the shared
+# ReplacesHarness, each step processes one bar and then checks the open orders, closed orders, and PnL.
+_REPLACES_STEPS = [
+    {'bartime': '2010-01-04 09:30:00',
+     'open': {'symbol': ['test.sym.10'], 'state': ['SENT'], 'buy_sell': ['sell'], 'quantity': [50],
+              'details': [{'price': 44.8}], 'closed': [False]},
+     'closed': None},
+    {'bartime': '2010-01-04 09:31:00',
+     'open': {'symbol': ['test.sym.10'], 'state': ['LIVE'], 'buy_sell': ['sell'], 'quantity': [50],
+              'details': [{'price': 44.8}], 'closed': [False]},
+     'closed': None},
+    {'bartime': '2010-01-04 09:32:00',
+     'open': {'symbol': ['test.sym.9', 'test.sym.10'], 'state': ['SENT', 'SENT'], 'buy_sell': ['buy', 'sell'],
+              'quantity': [100, 100], 'details': [{'price': 50.6}, {'price': 45.5}], 'closed': [False, False]},
+     'closed': {'symbol': ['test.sym.10'], 'state': ['FILLED'], 'buy_sell': ['sell'], 'fill_quantity': [50],
+                'fill_price': [44.8], 'closed': [True]},
+     'new_trades': 1,
+     'positions': {'test.sym.10': (-50, 50 * (44.8 - 43.93) - 50 * 0.01)}},
+    {'bartime': '2010-01-04 09:33:00',
+     'open': {'symbol': ['test.sym.9', 'test.sym.10', 'test.sym.9'],
+              'state': ['REPLACE_SENT', 'REPLACE_SENT', 'SENT'], 'buy_sell': ['buy', 'sell', 'buy'],
+              'quantity': [100, 75, 100], 'details': [{'price': 50.8}, {'price': 45.3}, {'price': 51.0}],
+              'closed': [False, False, False]},
+     'closed': {'symbol': ['test.sym.10'], 'state': ['FILLED'], 'buy_sell': ['sell'], 'fill_quantity': [50],
+                'fill_price': [44.8], 'closed': [True]},
+     'new_trades': 1,
+     'positions': {'test.sym.10': (-50, 50 * (44.8 - 44.43) - 50 * 0.01)}},
+    {'bartime': '2010-01-04 09:34:00',
+     'open': {'symbol': ['test.sym.9', 'test.sym.9'], 'state': ['REPLACE_SENT', 'REPLACE_SENT'],
+              'buy_sell': ['buy', 'buy'], 'quantity': [100, 50], 'details': [{'price': 51.7}, {'price': 51.0}],
+              'closed': [False, False], 'booked': [None, True], 'fill_quantity': [None, 54],
+              'fill_price': [None, 51.0]},
+     'closed': {'symbol': ['test.sym.10', 'test.sym.10'], 'state': ['FILLED', 'FILLED'], 'buy_sell': ['sell', 'sell'],
+                'fill_quantity': [50, 75], 'fill_price': [44.8, 45.3], 'closed': [True, True]},
+     'new_trades': 3,
+     'positions': {'test.sym.9': (54, 54 * (51.92 - 51.0) - 54 * 0.01),
+                   'test.sym.10': (-125, 50 * (44.8 - 44.82) + 75 * (45.3 - 44.82) - 125 * 0.01)}},
+    {'bartime': '2010-01-04 09:35:00',
+     'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'], 'quantity': [100],
+              'details': [{'price': 51.75}], 'closed': [False]},
+     'closed': {'symbol': ['test.sym.10', 'test.sym.10', 'test.sym.9'], 'state': ['FILLED', 'FILLED', 'FILLED'],
+                'buy_sell': ['sell', 'sell', 'buy'], 'fill_quantity': [50, 75, 54], 'fill_price': [44.8, 45.3, 51.0],
+                'closed': [True, True, True]},
+     'new_trades': 3,
+     'positions': {'test.sym.9': (54, 54 * (51.84 - 51.0) - 54 * 0.01),
+                   'test.sym.10': (-125, 50 * (44.8 - 44.94) + 75 * (45.3 - 44.94) - 125 * 0.01)}},
+    {'bartime': '2010-01-04 09:36:00',
+     'open': {'symbol': ['test.sym.9', 'test.sym.10'], 'state': ['REPLACE_SENT', 'SENT'], 'buy_sell': ['buy', 'sell'],
+              'quantity': [80, 50], 'details': [{'price': 51.5}, {'price': 44.5}], 'closed': [False, False]},
+     'closed': {'symbol': ['test.sym.10', 'test.sym.10', 'test.sym.9'], 'state': ['FILLED', 'FILLED', 'FILLED'],
+                'buy_sell': ['sell', 'sell', 'buy'], 'fill_quantity': [50, 75, 54], 'fill_price': [44.8, 45.3, 51.0],
+                'closed': [True, True, True]},
+     'new_trades': 4,
+     'positions': {'test.sym.9': (114, 60 * (51.83 - 51.75) + 54 * (51.83 - 51.0) - 114 * 0.01),
+                   'test.sym.10': (-125, 50 * (44.8 - 44.25) + 75 * (45.3 - 44.25) - 125 * 0.01)}},
+    {'bartime': '2010-01-04 09:37:00',
+     'open': None,
+     'closed': {'symbol': ['test.sym.10', 'test.sym.9', 'test.sym.10', 'test.sym.9', 'test.sym.10'],
+                'state': ['FILLED', 'FILLED', 'FILLED', 'FILLED', 'FILLED'],
+                'buy_sell': ['sell', 'buy', 'sell', 'buy', 'sell'], 'fill_quantity': [50, 80, 75, 54, 50],
+                'fill_price': [44.8, (60 * 51.75 + 20 * 51.5) / 80, 45.3, 51.0, 44.5],
+                'closed': [True, True, True, True, True]},
+     'new_trades': 6,
+     'positions': {'test.sym.9': (134, 80 * (51.16 - (60 * 51.75 + 20 * 51.5) / 80) + 54 * (51.16 - 51.0) - 134 * 0.01),
+                   'test.sym.10': (-175, 50 * (44.50 - 44.05) + 75 * (45.3 - 44.05) + 50 * (44.80 - 44.05)
+                                   - 175 * 0.01)}},
+]
+
+
+class ReplacesHarness:
+    """
+    Shared environment for the event loop with replaces test. The bars must be processed in order, so snapshot() will
+    process all the bars up to and including the requested step. The state is captured after each bar so any single
+    step can be run on its own and the steps can be run in any order.
+    """
+
+    def __init__(self):
+        # setup all the environment objects
+        self.oms = tw.OrderManager('unit_test', None)
+        self.tap = tw.PositionManager('pm_test', self.oms, None)
+        port = tw.Portfolio('port_test', self.oms, self.tap)
+        risk = tw.Risk(self.oms)
+
+        # Paper broker and paper exchange
+        exchange = tw.PaperExchange()
+        broker = tw.PaperBroker('broker_01', self.oms, exchange)
+
+        # Setup market data
+        datafeed = datalib.CsvDataFeed(csv_data_dir)
+        hdm = datalib.HistoricalDataManager(datafeed, host="temp")
+        ldm = datalib.LiveDataManager(datafeed, host="temp")
+        self.mdm = datalib.MarketDataManager(hdm, ldm)
+
+        # Now attach and link the objects to each other
+        self.tap.setup_market_data(self.mdm)
+        port.setup_market_data(self.mdm)
+
+        # set up the strategy
+        objects = _Objects(self.oms, self.mdm, self.tap)
+        strat = examples.strategy_examples.UnitTest_02('test_02', objects)
+
+        # Attached the strategy to the Portfolio
+        port.add_strategy(strat)
+
+        # Add the symbols to the strategy
+        strat.add_symbols([('stock', 'test.sym.9', '1min')])
+        strat.add_symbols([('stock', 'test.sym.10', '1min')])
+
+        # Set the strategy parameters
+        strat.set_parameters({'start_bar': 1})
+
+        # Initialize the event loop
+        self.event_loop = tw.EventProcessor([strat], [port], risk, self.oms, self.tap, broker, self.mdm, exchange)
+
+        # start the strategies
+        strat.start()
+
+        # put the market in open state
+        self.oms.market_state('stock', True)
+
+        # test that processing fills with nothing to fill just passes
+        self.event_loop.process_fills()
+
+        # test that processing cancels with nothing just passes
+        self.event_loop.process_cancels()
+
+        self.step = -1
+        self.snapshots = []
+
+    def _take_snapshot(self):
+        """
+        Capture everything the test checks for the current step, so the verification does not depend on the live
+        objects and can be done after later bars are processed.
+
+        :return: _ReplacesSnapshot
+        """
+        expected = _REPLACES_STEPS[self.step]
+        # the open orders only materialize the columns checked
+        if expected['open']:
+            open_df = self.oms.open_orders_view(expected['open'].keys())
+        else:
+            open_df = self.oms.open_orders_df()
+        closed_df = self.oms.closed_orders_df()
+        # the frames hold the Order objects' own mutable values such as the details dict, which later bars change
+        open_df, closed_df = copy.deepcopy(open_df), copy.deepcopy(closed_df)
+        new_trades = len(self.tap.new_trades)
+        positions = {symbol: self.tap.get_values('test_02', 'stock', symbol, ['current_position', 'net_pnl'])
+                     for symbol in expected.get('positions', {})}
+        return _ReplacesSnapshot(open_df, closed_df, new_trades, positions)
+
+    def snapshot(self, step):
+        """
+        Process the bars for all the steps after the current step up to and including the requested step, taking a
+        snapshot after each, and return the snapshot for the requested step.
+
+        :param step: integer step in _REPLACES_STEPS
+        :return: _ReplacesSnapshot
+        """
+        while self.step < step:
+            self.step += 1
+            bartime = pd.Timestamp(_REPLACES_STEPS[self.step]['bartime'], tz=default_time_zone)
+            self.event_loop.advance_to(bartime, ['stock'], '1min')
+            self.snapshots.append(self._take_snapshot())
+        return self.snapshots[step]
+
+
+@pytest.fixture(scope='module')
+def replaces_harness():
+    return ReplacesHarness()
+
+
+@pytest.fixture(scope='module')
+def paper_exchange():
+    # single exchange shared across tests, each test resets it before use
+    return tw.PaperExchange()
+
+
+@pytest.mark.parametrize('step', range(len(_REPLACES_STEPS)), ids=[x['bartime'] for x in _REPLACES_STEPS])
+def test_event_loop_w_replaces(replaces_harness, step):
+    # the simulation is run to the step first, the checks below only use the snapshot of the step
+    snapshot = replaces_harness.snapshot(step)
+    expected = _REPLACES_STEPS[step]
 
     # test open orders
-    assert len(oms.open_orders_df()) == 0
+    if expected['open'] is None:
+        assert len(snapshot.open_df) == 0
+    else:
+        _assert_open_orders(snapshot.open_df, expected['open'])
 
     # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.10', 'test.sym.9', 'test.sym.10', 'test.sym.9', 'test.sym.10'],
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'FILLED', 'FILLED'],
-                                    'buy_sell': ['sell', 'buy', 'sell', 'buy', 'sell'],
-                                    'fill_quantity': [50, 80, 75, 54, 50],
-                                    'fill_price': [44.8, (60 * 51.75 + 20 * 51.5) / 80, 45.3, 51.0, 44.5],
-                                    'closed': [True, True, True, True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
+    if expected['closed'] is None:
+        assert len(snapshot.closed_df) == 0
+    else:
+        expected_closed = rc.DataFrame(expected['closed'])
+        _afe(snapshot.closed_df[expected_closed.columns], expected_closed)
 
     # test booked orders
-    assert len(tap.new_trades) == 6
+    if 'new_trades' in expected:
+        assert snapshot.new_trades == expected['new_trades']
 
     # test PnL
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'current_position') == approx(134)
-    assert tap.get_value('test_02', 'stock', 'test.sym.9', 'net_pnl') == \
-           approx(80 * (51.16 - (60 * 51.75 + 20 * 51.5) / 80) + 54 * (51.16 - 51.0) - 134 * 0.01)
-
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'current_position') == approx(-175)
-    assert tap.get_value('test_02', 'stock', 'test.sym.10', 'net_pnl') == \
-           approx(50 * (44.50 - 44.05) + + 75 * (45.3 - 44.05) + 50 * (44.80 - 44.05) - 175 * 0.01)
+    for symbol, (position, net_pnl) in expected.get('positions', {}).items():
+        actual = snapshot.positions[symbol]
+        assert actual == approx({'current_position': position, 'net_pnl': net_pnl})
 
 
 def test_runner_w_replaces():
@@ -340,13 +417,13 @@ def test_runner_w_replaces():
                              'sell_avg_price': 0.0, 'sell_quantity': 0},
                             index=[('test_02', 'stock', 'test.sym.9')],
                             index_name=('strategy_id', 'product_type', 'symbol'), sort=True)
-    assert_frame_equal(pos_df.get(('test_02', 'stock', 'test.sym.9'), expected.columns), expected)
+    _afe(pos_df.get(('test_02', 'stock', 'test.sym.9'), expected.columns), expected)
 
     expected = rc.DataFrame({'buy_avg_price': 0.0, 'buy_quantity': 0, 'current_position': -175,
                              'sell_avg_price': 44.92857142857143, 'sell_quantity': 175},
                             index=[('test_02', 'stock', 'test.sym.10')],
                             index_name=('strategy_id', 'product_type', 'symbol'), sort=True)
-    assert_frame_equal(pos_df.get(('test_02', 'stock', 'test.sym.10'), expected.columns), expected)
+    _afe(pos_df.get(('test_02', 'stock', 'test.sym.10'), expected.columns), expected)
 
     # test the number of fills
     assert len(simrun.position_manager.new_trades) == 6
@@ -371,7 +448,7 @@ def test_runner_w_replaces():
                                     'fill_price': [44.8, (60 * 51.75 + 20 * 51.5) / 80, 45.3, 51.0, 44.5],
                                     'closed': [True, True, True, True, True]})
     actual_closed = simrun.order_manager.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
+    _afe(actual_closed, expected_closed)
     simrun.exit()
 
 
@@ -403,25 +480,25 @@ def test_runner_multi_strats():
                              'sell_avg_price': 52.26533834586466, 'sell_quantity': 133.0},
                             index=[('test_01', 'stock', 'test.sym.9')],
                             index_name=('strategy_id', 'product_type', 'symbol'), sort=True)
-    assert_frame_equal(pos_df.get(('test_01', 'stock', 'test.sym.9'), expected.columns), expected)
+    _afe(pos_df.get(('test_01', 'stock', 'test.sym.9'), expected.columns), expected)
 
     expected = rc.DataFrame({'buy_avg_price': 51.41044776119403, 'buy_quantity': 134.0, 'current_position': 134.0,
                              'sell_avg_price': 0.0, 'sell_quantity': 0.0},
                             index=[('test_02', 'stock', 'test.sym.9')],
                             index_name=('strategy_id', 'product_type', 'symbol'), sort=True)
-    assert_frame_equal(pos_df.get(('test_02', 'stock', 'test.sym.9'), expected.columns), expected)
+    _afe(pos_df.get(('test_02', 'stock', 'test.sym.9'), expected.columns), expected)
 
     expected = rc.DataFrame({'buy_avg_price': 0.0, 'buy_quantity': 0.0, 'current_position': -175.0,
                              'sell_avg_price': 44.92857142857143, 'sell_quantity': 175.0},
                             index=[('test_02', 'stock', 'test.sym.10')],
                             index_name=('strategy_id', 'product_type', 'symbol'), sort=True)
-    assert_frame_equal(pos_df.get(('test_02', 'stock', 'test.sym.10'), expected.columns), expected)
+    _afe(pos_df.get(('test_02', 'stock', 'test.sym.10'), expected.columns), expected)
 
     # aggregate across strategies
-    actual_positions = aggregate_rc(pos_df[['current_position']], 'symbol', sum)
+    actual_positions = aggregate_rc_fast(pos_df[['current_position']], 'symbol')
     expected_positions = rc.DataFrame({'current_position': [-175, 176]}, index=['test.sym.10', 'test.sym.9'],
                                       index_name='symbol', sort=True)
-    assert_frame_equal(actual_positions, expected_positions)
+    _afe(actual_positions, expected_positions)
 
     # test the number of fills
     assert len(simrun.position_manager.new_trades) == 13
@@ -440,521 +517,309 @@ def test_runner_multi_strats():
            approx(50 * (44.50 - 44.38) + 75 * (45.3 - 44.38) + 50 * (44.80 - 44.38) - 175 * 0.01)
 
     # check open orders
-    expected_open = rc.DataFrame({'state': ['PARTIALLY_FILLED'], 'buy_sell': ['sell'], 'quantity': [85],
-                                  'fill_quantity': [56], 'details': [{'price': 52.5}], 'closed': [False],
-                                  'booked': [True]})
-    actual_open = simrun.order_manager.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
+    expected_open = {'state': ['PARTIALLY_FILLED'], 'buy_sell': ['sell'], 'quantity': [85], 'fill_quantity': [56],
+                     'details': [{'price': 52.5}], 'closed': [False], 'booked': [True]}
+    actual_open = simrun.order_manager.open_orders_view(expected_open.keys())
+    _assert_open_orders(actual_open, expected_open)
 
     # check closed orders
-    file_data = pd.read_csv(inst_dir / 'runner_multi_strat_closed_orders.csv', index_col=[0])
-    file_data = file_data.replace(np.nan, None)
-    expected_closed = rc.DataFrame(file_data.to_dict('list'))
+    expected_closed = _read_expected_closed('runner_multi_strat_closed_orders.csv')
     actual_closed = simrun.order_manager.closed_orders_df()[expected_closed.columns]
-    actual_closed['details'] = [str(x) for x in actual_closed.get_entire_column('details', as_list=True)]
-    assert_frame_equal(actual_closed, expected_closed)
+    actual_closed['details'] = list(map(str, actual_closed.get_entire_column('details', as_list=True)))
+    _afe(actual_closed, expected_closed)
     simrun.exit()
 
 
-def test_event_loop_intents():
-    # setup logging
-    # futils.setup_logging()
-
-    # setup all the environment objects
-    oms = tw.OrderManager('unit_test', None)
-    pm = tw.PositionManager('pm_test', oms, None)
-    port = tw.Portfolio('port_01', oms, pm)
-    risk = tw.Risk(oms)
-
-    # Paper broker and paper exchange
-    exchange = tw.PaperExchange(live_frequency='5min')
-    broker = tw.PaperBroker('broker_01', oms, exchange)
-
-    # Setup market data
-    csvdf = datalib.CsvDataFeed(csv_data_dir)
-    hdm = datalib.HistoricalDataManager(csvdf, host="temp")
-    ldm = datalib.LiveDataManager(csvdf, host="temp")
-    mdm = datalib.MarketDataManager(hdm, ldm)
-
-    # Now attach and link the objects to each other
-    pm.setup_market_data(mdm, live_frequency='5min')
-    port.setup_market_data(mdm, live_frequency='5min')
-
-    # setup the strategy
-    objects = namedtuple('OB', 'order_manager, market_data_manager, position_manager')(oms, mdm, pm)
-    strat = examples.strategy_examples.UnitTest_03('test_03', objects)
-
-    # Attached the strategy to the Portfolio
-    port.add_strategy(strat)
-
-    # Add the symbols to the strategy
-    strat.add_symbols([('stock', 'test.sym.9', '5min')])
-
-    # Set the strategy parameters
-    strat.set_parameters({'start_bar': 1})
-
-    # Initialize the event loop
-    event_loop = tw.EventProcessor([strat], [port], risk, oms, pm, broker, mdm, exchange)
-
-    # put the market in open state
-    oms.market_state('stock', True)
-
-    # start the strategies
-    strat.start()
-
-    # this bar will enter the orders from the strategy
-    mdm.bartime = pd.Timestamp('2010-01-04 09:35:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [25], 'details': [{'price': 51}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    assert len(oms.closed_orders_df()) == 0
-
-    # this bar will enter the orders from the strategy
-    mdm.bartime = pd.Timestamp('2010-01-04 09:40:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [25], 'details': [{'price': 52.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    assert len(oms.closed_orders_df()) == 0
-
-    # this bar will enter the orders from the strategy
-    mdm.bartime = pd.Timestamp('2010-01-04 09:45:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [25], 'details': [{'price': 53.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    assert len(oms.closed_orders_df()) == 0
-
-    # this bar will enter the orders from the strategy
-    mdm.bartime = pd.Timestamp('2010-01-04 09:50:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    assert len(oms.open_orders_df()) == 0
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['FILLED'], 'buy_sell': ['buy'],
-                                    'quantity': [25], 'details': [{'price': 53.0}], 'closed': [True], 'booked': [True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 25
-
-    # confirm on_filled was not called with any orders
-    assert strat.filled_orders is None
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 09:55:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [10.0], 'details': [{'price': 55.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['FILLED'], 'buy_sell': ['buy'],
-                                    'quantity': [25], 'details': [{'price': 53.0}], 'closed': [True], 'booked': [True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 25
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:00:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [20.0], 'details': [{'price': 56.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['FILLED'], 'buy_sell': ['buy'],
-                                    'quantity': [25], 'details': [{'price': 53.0}], 'closed': [True], 'booked': [True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 25
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:05:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [30.0], 'details': [{'price': 57.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['FILLED'], 'buy_sell': ['buy'],
-                                    'quantity': [25], 'details': [{'price': 53.0}], 'closed': [True], 'booked': [True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 25
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:10:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['sell'],
-                                  'quantity': [50.0], 'details': [{'price': 52.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9', 'test.sym.9'], 'state': ['FILLED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy'], 'quantity': [25.0, 30.0],
-                                    'fill_price': [53, 57.0], 'fill_quantity': [25, 30],
-                                    'closed': [True, True], 'booked': [True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 55
-
-    # confirm on_filled was not called with any orders
-    assert strat.filled_orders is None
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:15:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['sell'],
-                                  'quantity': [40.0], 'details': [{'price': 51.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9', 'test.sym.9'], 'state': ['FILLED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy'], 'quantity': [25.0, 30.0],
-                                    'fill_price': [53, 57.0], 'fill_quantity': [25, 30],
-                                    'closed': [True, True], 'booked': [True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 55
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:20:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['sell'],
-                                  'quantity': [30.0], 'details': [{'price': 50.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9', 'test.sym.9'], 'state': ['FILLED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy'], 'quantity': [25.0, 30.0],
-                                    'fill_price': [53, 57.0], 'fill_quantity': [25, 30],
-                                    'closed': [True, True], 'booked': [True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 55
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:25:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [10.0], 'details': [{'price': 49.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 3, 'state': ['FILLED'] * 3,
-                                    'buy_sell': ['buy', 'buy', 'sell'], 'quantity': [25.0, 30.0, 30.0],
-                                    'fill_price': [53, 57.0, 50.0], 'fill_quantity': [25, 30, 30],
-                                    'closed': [True] * 3, 'booked': [True] * 3})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # confirm no fills from intents invoke the on_fill() method
-    assert strat.filled_orders is None
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 25
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'gross_pnl') == approx(30 * (50 - 57) + 25 * (49 - 53))
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'net_pnl') == approx(30 * -7 + 25 * -4 + 85 * -0.01)
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:30:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'] * 2, 'state': ['CANCEL_SENT', 'SENT'],
-                                  'buy_sell': ['buy', 'sell'], 'quantity': [10.0, 10.0],
-                                  'details': [{'price': 49.0}, {'price': 50.0}]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:35:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['sell'],
-                                  'quantity': [10.0], 'details': [{'price': 50.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 4, 'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy'], 'quantity': [25.0, 30.0, 30.0, 10.0],
-                                    'fill_price': [53, 57.0, 50.0, None], 'fill_quantity': [25, 30, 30, None],
-                                    'closed': [True] * 4, 'booked': [True, True, True, None]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:40:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'] * 2, 'state': ['CANCEL_SENT', 'SENT'],
-                                  'buy_sell': ['sell', 'buy'], 'quantity': [10.0, 5.0],
-                                  'details': [{'price': 50.0}, {'price': 50.0}], 'closed': [False, False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # check that orders not in the orders_list exposed to strategy
-    assert strat.orders_list() == []
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:45:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [70.0], 'details': [{'price': 50.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 6,
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy', 'sell', 'buy'],
-                                    'quantity': [25.0, 30.0, 30.0, 10.0, 10.0, 5.0],
-                                    'fill_price': [53, 57.0, 50.0, None, None, 50.0],
-                                    'fill_quantity': [25, 30, 30, None, None, 5.0],
-                                    'closed': [True] * 6, 'booked': [True, True, True, None, None, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # confirm no fills from intents invoke the on_fill() method
-    assert strat.filled_orders is None
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 30
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'gross_pnl') == approx(30 * (50 - 57) + 25 * (50 - 53))
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:50:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [70.0], 'details': [{'price': 50.5}],
-                                  'closed': [False], 'booked': [True]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 6,
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy', 'sell', 'buy'],
-                                    'quantity': [25.0, 30.0, 30.0, 10.0, 10.0, 5.0],
-                                    'fill_price': [53, 57.0, 50.0, None, None, 50.0],
-                                    'fill_quantity': [25, 30, 30, None, None, 5.0],
-                                    'closed': [True] * 6, 'booked': [True, True, True, None, None, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # confirm no fills from intents invoke the on_fill() method
-    assert strat.filled_orders is None
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 40
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 10:55:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'],
-                                  'quantity': [30.0], 'details': [{'price': 52.0}], 'closed': [False]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 6,
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy', 'sell', 'buy'],
-                                    'quantity': [25.0, 30.0, 30.0, 10.0, 10.0, 5.0],
-                                    'fill_price': [53, 57.0, 50.0, None, None, 50.0],
-                                    'fill_quantity': [25, 30, 30, None, None, 5.0],
-                                    'closed': [True] * 6, 'booked': [True, True, True, None, None, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 55
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 11:00:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'] * 2, 'state': ['SENT', 'SENT'], 'buy_sell': ['sell', 'buy'],
-                                  'quantity': [50.0, 100.0], 'details': [{'price': 54.5}, {'price': 53.0}]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 7,
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy', 'sell', 'buy', 'buy'],
-                                    'quantity': [25.0, 30.0, 30.0, 10.0, 10.0, 5.0, 30.0],
-                                    'fill_price': [53, 57.0, 50.0, None, None, 50.0, 50.583333333333336],
-                                    'fill_quantity': [25, 30, 30, None, None, 5.0, 30.0],
-                                    'closed': [True] * 7, 'booked': [True, True, True, None, None, True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test that the regular order is visible to strategy
-    assert len(strat.orders_list()) == 1
-    assert strat.orders_list()[0].uuid == strat.order_1
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 60
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 11:05:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'] * 2, 'state': ['SENT', 'SENT'], 'buy_sell': ['buy', 'sell'],
-                                  'quantity': [50.0, 10.0], 'details': [{'price': 51.5}, {'price': 54.5}]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 9,
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED', 'FILLED',
-                                              'FILLED', 'FILLED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy', 'sell', 'buy', 'buy', 'sell', 'buy'],
-                                    'quantity': [25.0, 30.0, 30.0, 10.0, 10.0, 5.0, 30.0, 50.0, 100.0],
-                                    'fill_price': [53, 57.0, 50.0, None, None, 50.0, 50.583333333333336, 54.5, 53.0],
-                                    'fill_quantity': [25, 30, 30, None, None, 5.0, 30.0, 50.0, 100.0],
-                                    'closed': [True] * 9,
-                                    'booked': [True, True, True, None, None, True, True, True, True]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test that the regular order is called in on_fills
-    # noinspection PyTypeChecker
-    assert len(strat.filled_orders) == 1
-    assert strat.filled_orders[0].uuid == strat.order_1
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 110
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 11:10:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
-
-    # test open orders
-    expected_open = rc.DataFrame({'symbol': ['test.sym.9'] * 2, 'state': ['CANCEL_SENT', 'CANCEL_SENT'],
-                                  'buy_sell': ['buy', 'sell'],
-                                  'quantity': [50.0, 10.0], 'details': [{'price': 51.5}, {'price': 54.5}]})
-    actual_open = oms.open_orders_df()[expected_open.columns]
-    assert_frame_equal(actual_open, expected_open)
-
-    # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 10,
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED', 'FILLED',
-                                              'FILLED', 'FILLED', 'RISK_REJECTED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy', 'sell', 'buy', 'buy', 'sell',
-                                                 'buy', 'buy'],
-                                    'quantity': [25.0, 30.0, 30.0, 10.0, 10.0, 5.0, 30.0, 50.0, 100.0, 490.0],
-                                    'fill_price': [53, 57.0, 50.0, None, None,
-                                                   50.0, 50.583333333333336, 54.5, 53.0, None],
-                                    'fill_quantity': [25, 30, 30, None, None, 5.0, 30.0, 50.0, 100.0, None],
-                                    'closed': [True] * 10,
-                                    'booked': [True, True, True, None, None, True, True, True, True, None]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 110
-
-    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    mdm.bartime = pd.Timestamp('2010-01-04 11:15:00', tz=default_time_zone)
-    event_loop.process_bar(['stock'], '5min')
+# Closed orders of the event loop with intents test in their final order, stored by column. At each bar the closed
+# orders are a selection of these rows, so the expected DataFrames are built from these rather than written out at
+# every bar.
+_INTENTS_CLOSED = {
+    'symbol': ('test.sym.9',) * 12,
+    'state': ('FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED', 'FILLED', 'FILLED', 'FILLED', 'CANCELED',
+              'CANCELED', 'RISK_REJECTED'),
+    'buy_sell': ('buy', 'buy', 'sell', 'buy', 'sell', 'buy', 'buy', 'sell', 'buy', 'buy', 'sell', 'buy'),
+    'quantity': (25.0, 30.0, 30.0, 10.0, 10.0, 5.0, 30.0, 50.0, 100.0, 50.0, 10.0, 490.0),
+    'details': ({'price': 53.0}, {'price': 57.0}, {'price': 50.0}, {'price': 49.0}, {'price': 50.0}, {'price': 50.0},
+                {'price': 52.0}, {'price': 54.5}, {'price': 53.0}, {'price': 51.5}, {'price': 54.5}, {'price': 52.0}),
+    'fill_price': (53.0, 57.0, 50.0, None, None, 50.0, 50.583333333333336, 54.5, 53.0, None, None, None),
+    'fill_quantity': (25, 30, 30, None, None, 5.0, 30.0, 50.0, 100.0, None, None, None),
+    'closed': (True,) * 12,
+    'booked': (True, True, True, None, None, True, True, True, True, None, None, None),
+}
+# the 5 minute bars of the event loop with intents test, 09:35 to 11:15
+_INTENTS_BARTIMES = pd.date_range('2010-01-04 09:35', '2010-01-04 11:15', freq='5min', tz=default_time_zone)
+_INTENTS_DETAILS_COLUMNS = ['symbol', 'state', 'buy_sell', 'quantity', 'details', 'closed', 'booked']
+_INTENTS_FILL_COLUMNS = ['symbol', 'state', 'buy_sell', 'quantity', 'fill_price', 'fill_quantity', 'closed', 'booked']
+
+
+def _expected_intents_closed(rows, columns, start=0):
+    """
+    Expected closed orders DataFrame for the event loop with intents test. If start is given then only the rows from
+    that location onward are included, with the index matching their location in the full closed orders.
+
+    :param rows: list of the row locations in _INTENTS_CLOSED
+    :param columns: list of columns
+    :param start: location of the first row to include
+    :return: raccoon DataFrame
+    """
+    rows = rows[start:]
+    return rc.DataFrame({c: [_INTENTS_CLOSED[c][i] for i in rows] for c in columns}, columns=columns,
+                        index=list(range(start, start + len(rows))), sort=True)
+
+
+# Expected state after each bar of the event loop with intents test, one step for each bar in _INTENTS_BARTIMES.
+# 'open' and 'closed' of None mean there are no open or closed orders, if the key is missing that is not checked.
+# 'closed' is the (rows, columns) of _INTENTS_CLOSED. 'strategy' maps a strategy attribute or method to either
+# None or the list of the strategy attributes holding the expected order uuids.
+_INTENTS_STEPS = [
+    {'open': {'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'], 'quantity': [25],
+              'details': [{'price': 51}], 'closed': [False]},
+     'closed': None},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'], 'quantity': [25],
+              'details': [{'price': 52.0}], 'closed': [False]},
+     'closed': None},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'], 'quantity': [25],
+              'details': [{'price': 53.0}], 'closed': [False]},
+     'closed': None},
+    {'open': None,
+     'closed': (range(1), _INTENTS_DETAILS_COLUMNS),
+     'position': 25,
+     'strategy': {'filled_orders': None}},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'], 'quantity': [10.0],
+              'details': [{'price': 55.0}], 'closed': [False]},
+     'closed': (range(1), _INTENTS_DETAILS_COLUMNS),
+     'position': 25},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'], 'quantity': [20.0],
+              'details': [{'price': 56.0}], 'closed': [False]},
+     'closed': (range(1), _INTENTS_DETAILS_COLUMNS),
+     'position': 25},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'], 'quantity': [30.0],
+              'details': [{'price': 57.0}], 'closed': [False]},
+     'closed': (range(1), _INTENTS_DETAILS_COLUMNS),
+     'position': 25},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['sell'], 'quantity': [50.0],
+              'details': [{'price': 52.0}], 'closed': [False]},
+     'closed': (range(2), _INTENTS_FILL_COLUMNS),
+     'position': 55,
+     'strategy': {'filled_orders': None}},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['sell'], 'quantity': [40.0],
+              'details': [{'price': 51.0}], 'closed': [False]},
+     'closed': (range(2), _INTENTS_FILL_COLUMNS),
+     'position': 55},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['sell'], 'quantity': [30.0],
+              'details': [{'price': 50.0}], 'closed': [False]},
+     'closed': (range(2), _INTENTS_FILL_COLUMNS),
+     'position': 55},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'], 'quantity': [10.0],
+              'details': [{'price': 49.0}], 'closed': [False]},
+     'closed': (range(3), _INTENTS_FILL_COLUMNS),
+     'position': 25,
+     'pnl': {'gross_pnl': 30 * (50 - 57) + 25 * (49 - 53), 'net_pnl': 30 * -7 + 25 * -4 + 85 * -0.01},
+     'strategy': {'filled_orders': None}},
+    {'open': {'symbol': ['test.sym.9'] * 2, 'state': ['CANCEL_SENT', 'SENT'], 'buy_sell': ['buy', 'sell'],
+              'quantity': [10.0, 10.0], 'details': [{'price': 49.0}, {'price': 50.0}]}},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['sell'], 'quantity': [10.0],
+              'details': [{'price': 50.0}], 'closed': [False]},
+     'closed': (range(4), _INTENTS_FILL_COLUMNS)},
+    {'open': {'symbol': ['test.sym.9'] * 2, 'state': ['CANCEL_SENT', 'SENT'], 'buy_sell': ['sell', 'buy'],
+              'quantity': [10.0, 5.0], 'details': [{'price': 50.0}, {'price': 50.0}], 'closed': [False, False]},
+     'strategy': {'orders_list': []}},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['SENT'], 'buy_sell': ['buy'], 'quantity': [70.0],
+              'details': [{'price': 50.0}], 'closed': [False]},
+     'closed': (range(6), _INTENTS_FILL_COLUMNS),
+     'position': 30,
+     'pnl': {'gross_pnl': 30 * (50 - 57) + 25 * (50 - 53)},
+     'strategy': {'filled_orders': None}},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'], 'quantity': [70.0],
+              'details': [{'price': 50.5}], 'closed': [False], 'booked': [True]},
+     'closed': (range(6), _INTENTS_FILL_COLUMNS),
+     'position': 40,
+     'strategy': {'filled_orders': None}},
+    {'open': {'symbol': ['test.sym.9'], 'state': ['REPLACE_SENT'], 'buy_sell': ['buy'], 'quantity': [30.0],
+              'details': [{'price': 52.0}], 'closed': [False]},
+     'closed': (range(6), _INTENTS_FILL_COLUMNS),
+     'position': 55},
+    {'open': {'symbol': ['test.sym.9'] * 2, 'state': ['SENT', 'SENT'], 'buy_sell': ['sell', 'buy'],
+              'quantity': [50.0, 100.0], 'details': [{'price': 54.5}, {'price': 53.0}]},
+     'closed': (range(7), _INTENTS_FILL_COLUMNS),
+     'position': 60,
+     'strategy': {'orders_list': ['order_1']}},
+    {'open': {'symbol': ['test.sym.9'] * 2, 'state': ['SENT', 'SENT'], 'buy_sell': ['buy', 'sell'],
+              'quantity': [50.0, 10.0], 'details': [{'price': 51.5}, {'price': 54.5}]},
+     'closed': (range(9), _INTENTS_FILL_COLUMNS),
+     'position': 110,
+     'strategy': {'filled_orders': ['order_1']}},
+    {'open': {'symbol': ['test.sym.9'] * 2, 'state': ['CANCEL_SENT', 'CANCEL_SENT'], 'buy_sell': ['buy', 'sell'],
+              'quantity': [50.0, 10.0], 'details': [{'price': 51.5}, {'price': 54.5}]},
+     'closed': ([*range(9), 11], _INTENTS_FILL_COLUMNS),
+     'position': 110},
+    {'open': None,
+     'closed': (range(12), _INTENTS_FILL_COLUMNS),
+     'position': 110,
+     'strategy': {'canceled_orders': ['order_2']}},
+]
+
+
+class IntentsHarness:
+    """
+    Shared environment for the event loop with intents test. Same as the ReplacesHarness the bars must be processed
+    in order, so snapshot() will process all the bars up to and including the requested step. The state is captured
+    after each bar so the checks of a step are independent of the bars processed after it.
+    """
+
+    def __init__(self, exchange):
+        """
+        :param exchange: PaperExchange, will be reset before use
+        """
+        # setup all the environment objects
+        self.oms = tw.OrderManager('unit_test', None)
+        self.pm = tw.PositionManager('pm_test', self.oms, None)
+        port = tw.Portfolio('port_01', self.oms, self.pm)
+        risk = tw.Risk(self.oms)
+
+        # Paper broker and paper exchange
+        exchange.reset(live_frequency='5min')
+        broker = tw.PaperBroker('broker_01', self.oms, exchange)
+
+        # Setup market data
+        csvdf = datalib.CsvDataFeed(csv_data_dir)
+        hdm = datalib.HistoricalDataManager(csvdf, host="temp")
+        ldm = datalib.LiveDataManager(csvdf, host="temp")
+        mdm = datalib.MarketDataManager(hdm, ldm)
+
+        # Now attach and link the objects to each other
+        self.pm.setup_market_data(mdm, live_frequency='5min')
+        port.setup_market_data(mdm, live_frequency='5min')
+
+        # setup the strategy
+        objects = _Objects(self.oms, mdm, self.pm)
+        self.strat = examples.strategy_examples.UnitTest_03('test_03', objects)
+
+        # Attached the strategy to the Portfolio
+        port.add_strategy(self.strat)
+
+        # Add the symbols to the strategy
+        self.strat.add_symbols([('stock', 'test.sym.9', '5min')])
+
+        # Set the strategy parameters
+        self.strat.set_parameters({'start_bar': 1})
+
+        # Initialize the event loop
+        self.event_loop = tw.EventProcessor([self.strat], [port], risk, self.oms, self.pm, broker, mdm, exchange)
+
+        # put the market in open state
+        self.oms.market_state('stock', True)
+
+        # start the strategies
+        self.strat.start()
+
+        self.step = -1
+        self.snapshots = []
+
+        # (step, rows, columns) of the last closed orders check that passed
+        self.closed_verified = (None, [], [])
+
+    def _take_snapshot(self):
+        """
+        Capture everything the test checks for the current step, so the verification does not depend on the live
+        objects and can be done after later bars are processed.
+
+        :return: _IntentsSnapshot
+        """
+        expected = _INTENTS_STEPS[self.step]
+        if expected['open']:
+            open_df = self.oms.open_orders_view(expected['open'].keys())
+        else:
+            open_df = self.oms.open_orders_df()
+
+        closed_df = self.oms.closed_orders_df()
+        # the frames hold the Order objects' own mutable values such as the details dict, which later bars change
+        open_df, closed_df = copy.deepcopy(open_df), copy.deepcopy(closed_df)
+
+        strategy = {}
+        for attribute in expected.get('strategy', {}):
+            orders = getattr(self.strat, attribute)
+            orders = orders() if callable(orders) else orders
+            strategy[attribute] = None if orders is None else [x.uuid for x in orders]
+        # the strategy order uuid attributes the expected order names refer to
+        for order_names in expected.get('strategy', {}).values():
+            for name in order_names or []:
+                strategy[name] = getattr(self.strat, name)
+
+        values = None
+        if 'position' in expected:
+            values = self.pm.get_values('test_03', 'stock', 'test.sym.9',
+                                        ['current_position', *expected.get('pnl', {})])
+
+        return _IntentsSnapshot(open_df, closed_df, strategy, values)
+
+    def snapshot(self, step):
+        """
+        Process the bars for all the steps after the current step up to and including the requested step, taking a
+        snapshot after each, and return the snapshot for the requested step.
+
+        :param step: integer step in _INTENTS_STEPS
+        :return: _IntentsSnapshot
+        """
+        while self.step < step:
+            self.step += 1
+            self.event_loop.advance_to(_INTENTS_BARTIMES[self.step], ['stock'], '5min')
+            self.snapshots.append(self._take_snapshot())
+        return self.snapshots[step]
+
+
+@pytest.fixture(scope='module')
+def intents_harness(paper_exchange):
+    return IntentsHarness(paper_exchange)
+
+
+@pytest.mark.parametrize('step', range(len(_INTENTS_STEPS)), ids=[str(x.time()) for x in _INTENTS_BARTIMES])
+def test_event_loop_intents(intents_harness, step):
+    # the simulation is run to the step first, the checks below only use the snapshot of the step
+    snapshot = intents_harness.snapshot(step)
+    expected = _INTENTS_STEPS[step]
 
     # test open orders
-    assert len(oms.open_orders_df()) == 0
+    if expected['open'] is None:
+        assert len(snapshot.open_df) == 0
+    else:
+        _assert_open_orders(snapshot.open_df, expected['open'])
 
     # test closed orders
-    expected_closed = rc.DataFrame({'symbol': ['test.sym.9'] * 12,
-                                    'state': ['FILLED', 'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'FILLED', 'FILLED',
-                                              'FILLED', 'FILLED', 'CANCELED', 'CANCELED', 'RISK_REJECTED'],
-                                    'buy_sell': ['buy', 'buy', 'sell', 'buy', 'sell', 'buy', 'buy', 'sell', 'buy',
-                                                 'buy', 'sell', 'buy'],
-                                    'quantity': [25.0, 30.0, 30.0, 10.0, 10.0, 5.0, 30.0, 50.0, 100.0, 50.0, 10.0,
-                                                 490.0],
-                                    'fill_price': [53, 57.0, 50.0, None, None, 50.0, 50.583333333333336, 54.5, 53.0,
-                                                   None,
-                                                   None, None],
-                                    'fill_quantity': [25, 30, 30, None, None, 5.0, 30.0, 50.0, 100.0, None, None, None],
-                                    'closed': [True] * 12,
-                                    'booked': [True, True, True, None, None, True, True, True, True, None, None, None]})
-    actual_closed = oms.closed_orders_df()[expected_closed.columns]
-    assert_frame_equal(actual_closed, expected_closed)
-
-    # test that the regular order is called in on_cancel
-    assert len(strat.canceled_orders) == 1
-    assert strat.canceled_orders[0].uuid == strat.order_2
+    if 'closed' in expected:
+        if expected['closed'] is None:
+            assert len(snapshot.closed_df) == 0
+        else:
+            # closed orders are final, so the leading rows that passed at the prior bar do not need to be checked
+            # again, only the length and the rows after them. The last step checks all the rows, so a change to an
+            # earlier closed order is still caught
+            rows, columns = list(expected['closed'][0]), expected['closed'][1]
+            prior_step, prior_rows, prior_columns = intents_harness.closed_verified
+            start = 0
+            if step < len(_INTENTS_STEPS) - 1 and prior_step == step - 1 and prior_columns == columns:
+                while start < min(len(rows), len(prior_rows)) and rows[start] == prior_rows[start]:
+                    start += 1
+            assert len(snapshot.closed_df) == len(rows)
+            expected_closed = _expected_intents_closed(rows, columns, start)
+            _afe(snapshot.closed_df.get(expected_closed.index, columns), expected_closed)
+            intents_harness.closed_verified = (step, rows, columns)
+
+    # test the orders exposed to the strategy
+    for attribute, order_names in expected.get('strategy', {}).items():
+        if order_names is None:
+            assert snapshot.strategy[attribute] is None
+        else:
+            assert snapshot.strategy[attribute] == [snapshot.strategy[x] for x in order_names]
 
     # test positions & PnL
-    assert pm.get_value('test_03', 'stock', 'test.sym.9', 'current_position') == 110
+    if 'position' in expected:
+        actual = dict(snapshot.values)
+        assert actual.pop('current_position') == expected['position']
+        assert actual == approx(expected.get('pnl', {}))
 
 
 def test_runner_intents():
-    # setup logging
-    # futils.setup_logging(filename='c:/temp/test_runner_intents.log')
+    _setup_test_logging()
 
     simrun = runner.SimRunner(host="temp")
     simrun.setup_market_data(data_feed="CsvDataFeed", directory=csv_data_dir, live_frequency='5min')
@@ -978,7 +843,7 @@ def test_runner_intents():
                              'sell_avg_price': 52.8125, 'sell_quantity': 80.0},
                             index=[('test_03', 'stock', 'test.sym.9')],
                             index_name=('strategy_id', 'product_type', 'symbol'), sort=True)
-    assert_frame_equal(pos_df.get(('test_03', 'stock', 'test.sym.9'), expected.columns), expected)
+    _afe(pos_df.get(('test_03', 'stock', 'test.sym.9'), expected.columns), expected)
 
     # test the number of fills
     assert len(simrun.position_manager.new_trades) == 9
@@ -991,19 +856,15 @@ def test_runner_intents():
     assert len(simrun.order_manager.open_orders_df()) == 0
 
     # check closed orders
-    file_data = pd.read_csv(inst_dir / 'runner_intent_closed_orders.csv', index_col=[0],
-                            float_precision='high')
-    file_data = file_data.replace(np.nan, None)
-    expected_closed = rc.DataFrame(file_data.to_dict('list'))
+    expected_closed = _read_expected_closed('runner_intent_closed_orders.csv')
     actual_closed = simrun.order_manager.closed_orders_df()[expected_closed.columns]
-    actual_closed['details'] = [str(x) for x in actual_closed.get_entire_column('details', as_list=True)]
-    assert_frame_equal(actual_closed, expected_closed)
+    actual_closed['details'] = list(map(str, actual_closed.get_entire_column('details', as_list=True)))
+    _afe(actual_closed, expected_closed)
     simrun.exit()
 
 
 def test_metric_strategy():
-    # setup logging
-    # futils.setup_logging(filename='c:/temp/test_metric_strategy.log')
+    _setup_test_logging()
 
     simrun = runner.SimRunner(host="temp", runner_id='simulation')
     simrun.setup_market_data(data_feed="CsvDataFeed", directory=csv_data_dir)
@@ -1019,14 +880,12 @@ def test_metric_strategy():
                             'frequency': ['1min'] * 3})
     simrun.add_symbols(symbols)
 
-    pnl = {}
-    equity = {}
-    for symbol in symbols['symbol_name'].to_list():
-        pnl[symbol] = metric.PositionManagerMetric(simrun.market_data_manager, simrun.position_manager, 'gross_pnl',
-                                                   sum, symbol=symbol)
-        equity[symbol] = metric.Accumulate(simrun.market_data_manager, pnl[symbol])
+    pnl = metric.PositionManagerMetric.batch(simrun.market_data_manager, simrun.position_manager, 'gross_pnl', sum,
+                                             symbols['symbol_name'].to_list())
+    equity = collections.OrderedDict((symbol, metric.Accumulate(simrun.market_data_manager, symbol_pnl))
+                                     for symbol, symbol_pnl in pnl.items())
 
-    simrun.add_eod_metrics(collections.OrderedDict(list(zip(equity.keys(), equity.values()))))
+    simrun.add_eod_metrics(equity)
 
     bartimes = simrun.bartimes(pd.Timestamp('2010-01-04 09:31:00', tz=NYC),
                                pd.Timestamp('2010-01-08 16:00:00', tz=NYC), include_open=False)
@@ -2,8 +2,8 @@
 Moving average metrics
 """
 
+import collections
 import math
-import statistics
 
 from metric import Metric
 
@@ -13,11 +13,53 @@ class SimpleMovingAverage(Metric):
         super().__init__(market_data_manager)
         self.ts = self.series_wrap(data)
         self.length = length
+        # the values in the current window, updated without a slice of the input when there is one new bar
+        self._window = collections.deque(maxlen=length)
+        # running sum of the window and its Neumaier compensation, so the rounding error does not build up as values
+        # are added to and removed from the window over the series
+        self._sum = 0.0
+        self._compensation = 0.0
+        # the input Series whose length shows if bars were added that this metric did not calculate on
+        self._source = self.ts.data if isinstance(self.ts, Metric) else self.ts
+        self._source_len = None
+
+    def _add(self, value):
+        """
+        Add a value to the compensated running sum of the window. Removing a value is adding its negative.
+
+        :param value: value
+        :return: nothing
+        """
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._compensation += (self._sum - total) + value
+        else:
+            self._compensation += (value - total) + self._sum
+        self._sum = total
 
     def _calculate(self, datetime):
-        bars_back = max(-self.length + 1, -len(self.data))
-        data_slice = self.ts[bars_back:0]
-        return statistics.mean(data_slice)
+        value = self.ts[0]  # read first so a Metric input has calculated the current bar before its length is taken
+        source_len = len(self._source)
+        next_bar = len(self.data) > 0 and datetime > self.data.index[-1] and source_len == self._source_len + 1
+        if next_bar and len(self._window) == min(self.length, len(self.data)):
+            # the prior input bar may have been overwritten in place after it was read, so refresh it
+            prior = self.ts[-1]
+            if prior != self._window[-1]:
+                self._add(prior - self._window[-1])
+                self._window[-1] = prior
+            if len(self._window) == self.length:
+                self._add(-self._window[0])
+            self._window.append(value)
+            self._add(value)
+        else:  # first bar, recalc or skipped input bars so rebuild the window and sum from the input
+            bars_back = max(-self.length + 1, -len(self.data))
+            self._window.clear()
+            self._window.extend(self.ts[bars_back:0])
+            self._sum = self._compensation = 0.0
+            for x in self._window:
+                self._add(x)
+        self._source_len = source_len
+        return (self._sum + self._compensation) / len(self._window)
 
 
 class ExponentialWeightedMA(Metric):
@@ -25,10 +67,15 @@ class ExponentialWeightedMA(Metric):
         super().__init__(market_data_manager)
         self.ts = self.series_wrap(data)
         self._lambda = math.pow(0.5, 1 / half_life)
+        self._one_minus_lambda = 1 - self._lambda
         self.first = True
 
     def _calculate(self, datetime):
-        if not self.first:
-            return (1 - self._lambda) * self.ts[0] + self._lambda * self._value(-1)
-        self.first = False
-        return self.ts[0]
+        if self.first:
+            self.first = False
+            return self.ts[0]
+        if datetime.value > self._last_ns:  # new datetime, the prior value is the last in the data
+            prior = self._data_list[-1]
+        else:  # recalc, the prior value is the one before the last
+            prior = self._value(-1)
+        return self._one_minus_lambda * self.ts[0] + self._lambda * prior
@@ -2,6 +2,9 @@
 Financial metrics like PnL, Sharpe, etc
 """
 
+from collections import OrderedDict
+from itertools import compress
+
 from .metric import Metric
 
 
@@ -29,7 +32,37 @@ class PositionManagerMetric(Metric):
         self._product_type = product_type
         self._symbol = symbol
         self.df = position_manager.positions_df
+        self._selector = (strategy_id, product_type, symbol)
+        # rows of the DataFrame that match the selector and a copy of the index they were selected from
+        self._rows = None
+        self._rows_index = None
+        # built in reducers that take any iterable, so the selected values do not need to be put in a list first
+        self._reduces_iterable = aggregation_fn in (sum, min, max)
+
+    @classmethod
+    def batch(cls, market_data_manager, position_manager, column, aggregation_fn, symbols, strategy_id=None,
+              product_type=None):
+        """
+        Create one PositionManagerMetric for each symbol, all sharing the same PositionManager DataFrame.
+
+        :param market_data_manager: MarketDataManager object
+        :param position_manager: PositionManager object
+        :param column: column from the PositionManager DataFrame
+        :param aggregation_fn: aggregation function to apply to the list
+        :param symbols: list of symbol names
+        :param strategy_id: strategy ID, or None for all
+        :param product_type: product type, or None for all
+        :return: OrderedDict of {symbol: PositionManagerMetric}
+        """
+        return OrderedDict((symbol, cls(market_data_manager, position_manager, column, aggregation_fn,
+                                        strategy_id=strategy_id, product_type=product_type, symbol=symbol))
+                           for symbol in symbols)
 
     def _calculate(self, datetime):
-        rows = self.df.select_index((self._strategy_id, self._product_type, self._symbol))
-        return self._aggregation_fn(self.df.get_rows(rows, self._column, as_list=True))
+        # select_index compares every row in Python, so only select again when the DataFrame index has changed
+        index = self.df.index
+        if index != self._rows_index:
+            self._rows = self.df.select_index(self._selector)
+            self._rows_index = list(index)
+        values = compress(self.df.get_entire_column(self._column, as_list=True), self._rows)
+        return self._aggregation_fn(values if self._reduces_iterable else list(values))
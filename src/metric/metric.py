@@ -2,8 +2,9 @@
 Metric class. This is the Abstract Base Class for all metric class implementations.
 """
 
+import functools
+import itertools
 import logging
-import uuid
 from abc import ABCMeta, abstractmethod
 
 import pandas as pd
@@ -13,21 +14,88 @@ from data.structures import SymbolTuple
 
 log = logging.getLogger(__name__)
 
+# Metric identifiers only need to be unique within the process, so a counter is used rather than uuid4
+_uuid_counter = itertools.count()
+
+
+@functools.singledispatch
+def _series_wrap(object_in, market_data_manager):
+    """
+    Type dispatched implementation of Metric.series_wrap(). Handlers are registered by the type of object_in.
+
+    :param object_in: either Metric, Series, ViewSeries, (DataFrame, column) or (SymbolTuple, component)
+    :param market_data_manager: MarketDataManager object
+    :return: Metric or ViewSeries
+    """
+    raise ValueError('not valid object_in')
+
+
+@_series_wrap.register(rc.ViewSeries)
+def _(object_in, market_data_manager):
+    return object_in
+
+
+@_series_wrap.register(rc.Series)
+def _(object_in, market_data_manager):
+    return rc.ViewSeries.from_series(object_in, offset=1)
+
+
+@_series_wrap.register(tuple)
+def _(object_in, market_data_manager):
+    return _structure_wrap(object_in[0], object_in[1], market_data_manager)
+
+
+@functools.singledispatch
+def _structure_wrap(structure, column, market_data_manager):
+    """
+    Type dispatched ViewSeries for the (structure, column) tuple input of series_wrap(). Handlers are registered by the
+    type of the structure.
+
+    :param structure: SymbolTuple or DataFrame
+    :param column: column or component name
+    :param market_data_manager: MarketDataManager object
+    :return: ViewSeries
+    """
+    raise ValueError('not valid object_in')
+
+
+@_structure_wrap.register(SymbolTuple)
+def _(structure, column, market_data_manager):
+    return market_data_manager.view_series(structure.product_type, structure.symbol, structure.frequency, column)
+
+
+@_structure_wrap.register(rc.DataFrame)
+def _(structure, column, market_data_manager):
+    return rc.ViewSeries.from_dataframe(structure, column, offset=1)
+
 
 class Metric(metaclass=ABCMeta):
     """
     The abstract base class for all metric classes.
     """
 
+    # the base attributes are read on every calculation, so they are slots rather than instance dict entries. Concrete
+    # implementations that do not define __slots__ still get an instance dict for their own attributes.
+    __slots__ = ('__uuid', '_mdm', '_data', '_index_list', '_data_list', '_recalc_ns', '_recalc_offset',
+                 '_last_ns')
+
     def __init__(self, market_data_manager):
         """
         Concrete implementations should have an __init__ method and call this via Super().__init__(mdm)
         :param market_data_manager: MarketDataManager object
         """
 
-        self.__uuid = str(uuid.uuid4())
+        self.__uuid = f'{type(self).__name__}-{next(_uuid_counter)}'
         self._mdm = market_data_manager
         self._data = rc.Series(data_name='value', index_name='datetime', sort=True)
+        # the index and data lists of the Series, which are changed in place, bound once to skip the property lookups
+        self._index_list = self._data.index
+        self._data_list = self._data.data
+        # bartime as int64 nanoseconds the recalc offset was last determined for, and the offset (1 for a recalc,
+        # otherwise 0)
+        self._recalc_ns = None
+        self._recalc_offset = 0
+        self._last_ns = None  # last datetime in the data as int64 nanoseconds, cheaper to compare than Timestamps
         log.info(f'Metric initialized : {self}')
 
     @property
@@ -45,21 +113,23 @@ class Metric(metaclass=ABCMeta):
         :param object_in: either Metric, Series, ViewSeries, (DataFrame, column) or (SymbolTuple, component)
         :return: Metric or ViewSeries
         """
-        if isinstance(object_in, Metric):
-            return object_in
-        elif isinstance(object_in, rc.ViewSeries):
-            return object_in
-        elif isinstance(object_in, rc.Series):
-            return rc.ViewSeries.from_series(object_in, offset=1)
-        elif isinstance(object_in, tuple):
-            structure = object_in[0]
-            column = object_in[1]
-            if isinstance(structure, SymbolTuple):
-                bars = self._mdm.view(structure.product_type, structure.symbol, structure.frequency)
-                return rc.ViewSeries.from_dataframe(bars, column, offset=1)
-            elif isinstance(structure, rc.DataFrame):
-                return rc.ViewSeries.from_dataframe(structure, column, offset=1)
-        raise ValueError('not valid object_in')
+        return _series_wrap(object_in, self._mdm)
+
+    @staticmethod
+    def current_wrap(series):
+        """
+        Returns a function with no arguments that returns series[0], the current value of a series_wrap() output. For
+        a ViewSeries this reads the underlying data list directly, skipping the ViewSeries indexing, so use this for
+        the [0] lookup done on every bar.
+
+        :param series: Metric or ViewSeries from series_wrap()
+        :return: function
+        """
+        if isinstance(series, rc.ViewSeries):
+            values = series.data
+            location = -series.offset
+            return lambda: values[location]
+        return functools.partial(series.value, 0)
 
     @abstractmethod
     def _calculate(self, datetime):
@@ -79,15 +149,49 @@ class Metric(metaclass=ABCMeta):
 
         This method calls the concrete implementation of _calculate() where the metric specific calc is performed.
 
-        :param datetime: datetime
+        :param datetime: datetime as pandas Timestamp, or any datetime that converts to one
         :param force_recalc: if True then recalc the metric even if it already exists
         :return: nothing
         """
-        log.info(f'Calculating metric - {self} - {self.__uuid}')
-        if (len(self._data) == 0) \
-                or ((len(self._data) > 0) and (datetime > self._data.index[-1])) \
-                or force_recalc:
+        if log.isEnabledFor(logging.DEBUG):  # called every bar for every metric, only format the message if logged
+            log.debug('Calculating metric - %s - %s', self, self.__uuid)
+        datetime = pd.Timestamp(datetime)  # returns the same object for a Timestamp, so only converts other types
+        ns = datetime.value
+        if (self._last_ns is None) or (ns > self._last_ns):
+            # the datetime is known to not be in the data, so when it is the bartime the _value() calls in _calculate()
+            # do not need to look up the recalc offset
+            self._recalc_ns, self._recalc_offset = ns, 0
+            value = self._calculate(datetime)
+            # a datetime after the last is appended straight to the end of the index and data lists, the sorted insert
+            # of the raccoon Series setter is not needed
+            self._index_list.append(datetime)
+            self._data_list.append(value)
+            self._last_ns = ns
+        elif force_recalc:
+            if ns == self._last_ns:  # recalc of the last datetime
+                self._recalc_ns, self._recalc_offset = ns, 1
             self._data[datetime] = self._calculate(datetime)
+        else:
+            return
+        self._recalc_ns = None  # the data changed so the recalc offset must be determined again
+
+    def _recalc(self):
+        """
+        Returns the index offset for _value(), 1 if the current bartime is already in the data so this is a recalc,
+        otherwise 0. The offset is only determined once per bartime and again after the data changes. The bartime is
+        compared by value so an equal Timestamp that is a different object still uses the cached offset. Before the
+        first bar the bartime is None and the offset is 0.
+
+        :return: 1 or 0
+        """
+        bartime = self._mdm.bartime
+        if bartime is None:
+            return 0
+        ns = bartime.value
+        if self._recalc_ns != ns:
+            self._recalc_offset = 1 if self._last_ns == ns else 0
+            self._recalc_ns = ns
+        return self._recalc_offset
 
     def _value(self, index):
         """
@@ -105,19 +209,13 @@ class Metric(metaclass=ABCMeta):
         if isinstance(index, int):
             if index > 0:
                 raise IndexError('Index must be <= 0')
-            if self._data.index[-1] == self._mdm.bartime:  # if it is a recalc offset the index
-                index -= 1
-            return self._data.data[index]
+            return self._data_list[index - self._recalc()]
         elif isinstance(index, pd.Timestamp):
             return self._data[index]
         elif isinstance(index, tuple):
-            recalc = self._data.index[-1] == self._mdm.bartime  # if it is a recalc offset the index
-            start = index[0] - (1 if recalc else 0)
-            stop = index[1] - (1 if recalc else 0)
-            if stop >= -1:
-                return self._data.data[start:]
-            else:
-                return self._data.data[start:stop]
+            offset = self._recalc()
+            stop = index[1] - offset
+            return self._data_list[index[0] - offset:(stop if stop < -1 else None)]
         else:
             raise ValueError('Index not a valid type.')
 
@@ -139,17 +237,13 @@ class Metric(metaclass=ABCMeta):
         if isinstance(index, int):
             if index > 0:
                 raise IndexError('Index must be <= 0')
-            return self._data.data[index - 1]
+            return self._data_list[index - 1]
 
         elif isinstance(index, pd.Timestamp):
             return self._data[index]
 
         elif isinstance(index, slice):
-            start = index.start - 1
-            if index.stop == 0:
-                return self._data.data[start:]
-            else:
-                return self._data.data[start:index.stop]
+            return self._data_list[index.start - 1:(index.stop or None)]
 
         else:
             raise ValueError('Index not a valid type.')
@@ -162,3 +256,8 @@ class Metric(metaclass=ABCMeta):
         :return: DataFrame of the subset slice
         """
         return self.value(index)
+
+
+@_series_wrap.register(Metric)
+def _(object_in, market_data_manager):
+    return object_in
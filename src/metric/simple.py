@@ -10,12 +10,15 @@ class Duplicate(Metric):
     A simple duplicate (copy) of the data into the metric. No math, no transformations.
     """
 
+    __slots__ = ('ts', '_current')
+
     def __init__(self, market_data_manager, data):
         super().__init__(market_data_manager)
         self.ts = self.series_wrap(data)
+        self._current = self.current_wrap(self.ts)
 
     def _calculate(self, datetime):
-        return self.ts[0]
+        return self._current()
 
 
 class Accumulate(Metric):
@@ -23,15 +26,25 @@ class Accumulate(Metric):
     Running total (accumulation) of the time_series input
     """
 
+    __slots__ = ('ts', '_current', '_total', '_prior_total')
+
     def __init__(self, market_data_manager, data):
         super().__init__(market_data_manager)
         self.ts = self.series_wrap(data)
+        self._current = self.current_wrap(self.ts)
+        # the running total to the last datetime, and to the datetime before that for a recalc of the last datetime
+        self._total = None
+        self._prior_total = None
 
     def _calculate(self, datetime):
-        if len(self.data) == 0:
-            return self.ts[0]
-        else:
-            return self.ts[0] + self._value(-1)
+        current = self._current()
+        ns = datetime.value
+        if self._last_ns is None or ns > self._last_ns:  # new datetime
+            self._prior_total = self._total
+        elif ns != self._last_ns:  # recalc of an earlier datetime is not part of the running total
+            return current + self._value(-1)
+        self._total = current if self._prior_total is None else self._prior_total + current
+        return self._total
 
 
 class Subtraction(Metric):
@@ -39,13 +52,17 @@ class Subtraction(Metric):
     Difference (subtraction) between two inputs
     """
 
+    __slots__ = ('left_data', 'right_data', '_left_current', '_right_current')
+
     def __init__(self, market_data_manager, left_data, right_data):
         super().__init__(market_data_manager)
         self.left_data = self.series_wrap(left_data)
         self.right_data = self.series_wrap(right_data)
+        self._left_current = self.current_wrap(self.left_data)
+        self._right_current = self.current_wrap(self.right_data)
 
     def _calculate(self, datetime):
-        return self.left_data[0] - self.right_data[0]
+        return self._left_current() - self._right_current()
 
 
 class Difference(Metric):
@@ -53,6 +70,8 @@ class Difference(Metric):
     Lagged difference (change) in one data stream between the most recent value and a value lag_bars ago
     """
 
+    __slots__ = ('ts', 'lag_bars', '_current')
+
     def __init__(self, market_data_manager, data, lag_bars):
         """
 
@@ -64,13 +83,14 @@ class Difference(Metric):
             raise AttributeError('lag_bars must be a positive number greater than zero')
         super().__init__(market_data_manager)
         self.ts = self.series_wrap(data)
+        self._current = self.current_wrap(self.ts)
         self.lag_bars = lag_bars
 
     def _calculate(self, datetime):
         if len(self.ts) <= self.lag_bars:  # If these are not enough bars yet return None
             return None
 
-        last = self.ts[0]
+        last = self._current()
         prior = self.ts[-self.lag_bars]
         if not last or not prior:  # If either value is None, return None
             return None
@@ -1,36 +1,136 @@
+import random
+import statistics
+
+import numpy as np
 import pandas as pd
+import pytest
 import raccoon as rc
-from numpy.testing import assert_almost_equal
+from numpy.testing import assert_allclose
 
 import metric as metric
 import data
 from metric.average import ExponentialWeightedMA, SimpleMovingAverage
 
 
+def assert_values_close(actual, expected):
+    # float arrays so the comparison is vectorized rather than element by element over object arrays. The tolerance
+    # is absolute only, the same 1.5e-7 as assert_almost_equal to 7 decimals, as the expected values are rounded to 7
+    # decimal places and some are exactly 0
+    assert_allclose(np.asarray(actual, dtype='f8'), np.asarray(expected, dtype='f8'), rtol=0, atol=1.5e-7)
+
+
 def assert_metric_result(mdm, met, all_data, in_data, expected):
-    for row in all_data.iterrows():
-        datetime = row.pop('index')
+    # iterate over the index and column lists together rather than building a row object for each bar
+    columns = all_data.columns
+    for datetime, *values in zip(all_data.index, *(all_data.get_entire_column(c, as_list=True) for c in columns)):
         mdm.bartime = datetime
-        in_data.append_row(datetime, row)
+        in_data.append_row(datetime, dict(zip(columns, values)))
         met.value(0)
-    assert_almost_equal(met.data.data, expected)
+    assert_values_close(met.data.data, expected)
+
 
+@pytest.fixture(scope='module')
+def all_data():
+    # input data shared by the tests, only read and never changed
+    return rc.DataFrame({'close': [1, 2, 3, 4, 5, 6]}, index=pd.date_range('2010-01-01', freq='1D', periods=6).tolist())
 
-def test_simple_ma():
+
+def test_simple_ma(all_data):
     mdm = data.MarketDataManager(None, None)
-    all_data = rc.DataFrame({'close': [1, 2, 3, 4, 5, 6]},
-                            index=pd.date_range('2010-01-01', freq='1D', periods=6).tolist())
     in_data = rc.DataFrame(columns=['close'])
 
     met = SimpleMovingAverage(mdm, (in_data, 'close'), 3)
     assert_metric_result(mdm, met, all_data, in_data, [1, 1.5, 2, 3, 4, 5])
 
 
-def test_simple_ma_compound():
+def test_simple_ma_recalc_and_skipped_bars():
+    mdm = data.MarketDataManager(None, None)
+    dates = pd.date_range('2010-01-01', freq='1D', periods=6).tolist()
+    in_data = rc.DataFrame(columns=['close'])
+    met = SimpleMovingAverage(mdm, (in_data, 'close'), 3)
+
+    for datetime, close in zip(dates[:3], [1, 2, 3]):
+        mdm.bartime = datetime
+        in_data.append_row(datetime, {'close': close})
+        met.value(0)
+    assert_values_close(met.data.data, [1, 1.5, 2])
+
+    # recalc of the last bar after the input changed
+    in_data[dates[2], 'close'] = 6
+    met.calculate(mdm.bartime, force_recalc=True)
+    assert_values_close(met.data.data, [1, 1.5, 3])
+
+    # two input bars with only one metric calculation
+    for datetime, close in zip(dates[3:5], [4, 5]):
+        mdm.bartime = datetime
+        in_data.append_row(datetime, {'close': close})
+    met.value(0)
+    assert_values_close(met.data.data, [1, 1.5, 3, 5])
+
+    # back to one new bar at a time
+    mdm.bartime = dates[5]
+    in_data.append_row(dates[5], {'close': 9})
+    met.value(0)
+    assert_values_close(met.data.data, [1, 1.5, 3, 5, 6])
+
+
+def test_simple_ma_metric_input_skipped_bars():
+    # the input Metric is calculated on every bar but the SMA only on some
+    mdm = data.MarketDataManager(None, None)
+    dates = pd.date_range('2010-01-01', freq='1D', periods=6).tolist()
+    in_data = rc.DataFrame(columns=['close'])
+    dup = metric.Duplicate(mdm, (in_data, 'close'))
+    met = SimpleMovingAverage(mdm, dup, 3)
+
+    for i, (datetime, close) in enumerate(zip(dates, [1, 2, 3, 4, 5, 6])):
+        mdm.bartime = datetime
+        in_data.append_row(datetime, {'close': close})
+        dup.value(0)
+        if i in [0, 1, 3, 5]:
+            met.value(0)
+    assert len(met.data) == 4
+    assert_values_close(met.data.data, [1, 1.5, 3, 5])
+
+
+def test_simple_ma_overwritten_last_bar():
+    # the last input bar is overwritten in place after the SMA has read it, as a live data update does
+    mdm = data.MarketDataManager(None, None)
+    dates = pd.date_range('2010-01-01', freq='1D', periods=4).tolist()
+    in_data = rc.DataFrame(columns=['close'])
+    met = SimpleMovingAverage(mdm, (in_data, 'close'), 3)
+
+    for datetime, close in zip(dates[:3], [1, 2, 3]):
+        mdm.bartime = datetime
+        in_data.append_row(datetime, {'close': close})
+        met.value(0)
+    in_data.set_location(-1, {'close': 6})
+
+    mdm.bartime = dates[3]
+    in_data.append_row(dates[3], {'close': 4})
+    met.value(0)
+    assert_values_close(met.data.data, [1, 1.5, 2, 4])
+
+
+def test_simple_ma_long_series():
+    # the average of each window matches statistics.mean and the error does not build up over the series
+    mdm = data.MarketDataManager(None, None)
+    rand = random.Random(1234)
+    closes = [rand.uniform(-1000, 1000) for _ in range(5000)]
+    dates = pd.date_range('2010-01-01', freq='1min', periods=len(closes)).tolist()
+    in_data = rc.DataFrame(columns=['close'])
+    met = SimpleMovingAverage(mdm, (in_data, 'close'), 20)
+
+    for datetime, close in zip(dates, closes):
+        mdm.bartime = datetime
+        in_data.append_row(datetime, {'close': close})
+        met.value(0)
+    expected = [statistics.mean(closes[max(0, i - 19):i + 1]) for i in range(len(closes))]
+    assert_allclose(met.data.data, expected, rtol=1e-15, atol=0)
+
+
+def test_simple_ma_compound(all_data):
     # compound as SMA(SMA(data))
     mdm = data.MarketDataManager(None, None)
-    all_data = rc.DataFrame({'close': [1, 2, 3, 4, 5, 6]},
-                            index=pd.date_range('2010-01-01', freq='1D', periods=6).tolist())
     in_data = rc.DataFrame(columns=['close'])
 
     ma1 = SimpleMovingAverage(mdm, (in_data, 'close'), 3)
@@ -50,11 +150,40 @@ def test_simple_ma_difference():
     assert_metric_result(mdm, diff, all_data, in_data, [0, 0, 0, 0.50, 0.25, -0.25])
 
 
-def test_ewma():
+def test_ewma(all_data):
     mdm = data.MarketDataManager(None, None)
-    all_data = rc.DataFrame({'close': [1, 2, 3, 4, 5, 6]},
-                            index=pd.date_range('2010-01-01', freq='1D', periods=6).tolist())
     in_data = rc.DataFrame(columns=['close'])
 
     met = ExponentialWeightedMA(mdm, (in_data, 'close'), 5)
     assert_metric_result(mdm, met, all_data, in_data, [1.000000, 1.1294494, 1.3715912, 1.7118372, 2.137488, 2.637488])
+
+    # recalc of the last bar uses the value before it
+    in_data[pd.Timestamp('2010-01-06'), 'close'] = 7
+    met.calculate(mdm.bartime, force_recalc=True)
+    assert_values_close(met.data.data[-1], (1 - met._lambda) * 7 + met._lambda * 2.137488)
+    mdm.bartime = pd.Timestamp('2010-01-07')
+    in_data.append_row(pd.Timestamp('2010-01-07'), {'close': 7})
+    met.value(0)
+    assert_values_close(met.data.data[-1], (1 - met._lambda) * 7 + met._lambda * met.data.data[-2])
+
+
+def test_ewma_recalc_earlier_bar(all_data):
+    mdm = data.MarketDataManager(None, None)
+    in_data = rc.DataFrame(columns=['close'])
+    met = ExponentialWeightedMA(mdm, (in_data, 'close'), 5)
+    assert_metric_result(mdm, met, all_data, in_data, [1.000000, 1.1294494, 1.3715912, 1.7118372, 2.137488, 2.637488])
+
+    # recalc of an earlier bar does not change the value the next bar is blended with
+    met.calculate(met.data.index[2], force_recalc=True)
+    mdm.bartime = pd.Timestamp('2010-01-07')
+    in_data.append_row(pd.Timestamp('2010-01-07'), {'close': 7})
+    met.value(0)
+
+    fresh_mdm = data.MarketDataManager(None, None)
+    fresh_data = rc.DataFrame(columns=['close'])
+    fresh = ExponentialWeightedMA(fresh_mdm, (fresh_data, 'close'), 5)
+    for datetime, close in zip(in_data.index, in_data.get_entire_column('close', as_list=True)):
+        fresh_mdm.bartime = datetime
+        fresh_data.append_row(datetime, {'close': close})
+        fresh.value(0)
+    assert_values_close(met.data.data[-1], fresh.data.data[-1])
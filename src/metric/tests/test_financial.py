@@ -49,3 +49,34 @@ def test_pnl():
     assert equity[0] == -262
     assert pnl_test[0] == -100 + 88
     assert pnl_strat02[0] == 88
+
+    # rows replaced with the same number of rows
+    mdm.bartime = '2017-05-05'
+    mock_df.delete_all_rows()
+    mock_df[('strat02', 'stock', 'AAPL'), 'net_pnl'] = 10
+    mock_df[('strat02', 'stock', 'MSFT'), 'net_pnl'] = 20
+    mock_df[('strat02', 'stock', 'TEST'), 'net_pnl'] = 30
+    assert pnl.value(0) == 60
+    assert pnl_test[0] == 30
+    assert pnl_strat02[0] == 60
+
+    # aggregation functions that need a list
+    assert PositionManagerMetric(mdm, pm, 'net_pnl', len, strategy_id='strat02')[0] == 3
+    assert PositionManagerMetric(mdm, pm, 'net_pnl', sorted, product_type='stock')[0] == [10, 20, 30]
+
+
+def test_pnl_batch():
+    mdm = data.MarketDataManager(None, None)
+
+    mock_df = rc.DataFrame(index_name=('strategy_id', 'product_type', 'symbol'), columns=['net_pnl'], sort=True)
+    pm = collections.namedtuple('MockPositionManager', 'positions_df')(mock_df)
+
+    pnl = PositionManagerMetric.batch(mdm, pm, 'net_pnl', sum, ['TEST', 'AAPL'], strategy_id='strat01')
+    assert list(pnl.keys()) == ['TEST', 'AAPL']
+
+    mdm.bartime = '2017-05-01'
+    mock_df[('strat01', 'stock', 'TEST'), 'net_pnl'] = 50
+    mock_df[('strat01', 'stock', 'AAPL'), 'net_pnl'] = -100
+    mock_df[('strat02', 'stock', 'TEST'), 'net_pnl'] = 88
+    assert pnl['TEST'][0] == 50
+    assert pnl['AAPL'][0] == -100
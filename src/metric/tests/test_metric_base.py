@@ -24,6 +24,8 @@ def test_initialize():
     assert isinstance(met, metric.Metric)
     assert isinstance(met.data, rc.Series)
     assert isinstance(met.uuid, str)
+    assert met.uuid.startswith('UnitTest01-')
+    assert unit_tests.UnitTest01(mdm, (in_data, 'close')).uuid != met.uuid
 
 
 def test_series_wrap():
@@ -56,6 +58,30 @@ def test_series_wrap():
     with pytest.raises(ValueError):
         unit_tests.UnitTest00(None).series_wrap(in_data)
 
+    # tuple of something other than a DataFrame or SymbolTuple fails
+    with pytest.raises(ValueError):
+        unit_tests.UnitTest00(None).series_wrap((srs_data, 'close'))
+
+
+def test_current_wrap():
+    in_data = rc.DataFrame(columns=['close'])
+    mdm = data.MarketDataManager(None, None)
+    met = metric.Duplicate(mdm, (in_data, 'close'))
+
+    close = unit_tests.UnitTest00(mdm).series_wrap((in_data, 'close'))
+    current_close = metric.Metric.current_wrap(close)
+    current_met = metric.Metric.current_wrap(met)
+
+    mdm.bartime = pd.Timestamp('2010-05-17', tz='America/New_York')
+    in_data.append_row(mdm.bartime, {'close': 10})
+    assert current_close() == close[0] == 10
+    assert current_met() == met[0] == 10
+
+    mdm.bartime = pd.Timestamp('2010-05-18', tz='America/New_York')
+    in_data.append_row(mdm.bartime, {'close': 11})
+    assert current_close() == close[0] == 11
+    assert current_met() == met[0] == 11
+
 
 def test_wrap_market_data():
     csvdf = data.CsvDataFeed(Path(__file__).parent.parent.parent / "data/tests/inst/csv_data_feed")
@@ -125,6 +151,7 @@ def test_calculate():
     met.calculate(mdm.bartime, force_recalc=True)
     expected[mdm.bartime] = 23
     assert_series_equal(met.data, expected)
+    met.data.validate_integrity()
 
 
 def test_value_int():
@@ -229,6 +256,72 @@ def test_under_value_datetime():
     assert met[-2] == 10
 
 
+def test_recalc_offset():
+    in_data = rc.DataFrame(columns=['close'])
+    mdm = data.MarketDataManager(None, None)
+    met = metric.Duplicate(mdm, (in_data, 'close'))
+
+    mdm.bartime = pd.Timestamp('2010-05-17', tz='America/New_York')
+    in_data.append_row(mdm.bartime, {'close': 10})
+    met.calculate(mdm.bartime)
+    assert met._recalc() == 1  # the bartime is in the data
+
+    # new bartime not yet calculated
+    mdm.bartime = pd.Timestamp('2010-05-18', tz='America/New_York')
+    in_data.append_row(mdm.bartime, {'close': 11})
+    assert met._recalc() == 0
+
+    # after the calculation the offset is determined again
+    met.calculate(mdm.bartime)
+    assert met._recalc() == 1
+    assert met._value(-1) == 10
+
+    # tuple slices are offset by the recalc
+    mdm.bartime = pd.Timestamp('2010-05-19', tz='America/New_York')
+    in_data.append_row(mdm.bartime, {'close': 12})
+    assert met._value((-1, -1)) == [11]
+    met.calculate(mdm.bartime)
+    assert met._value((-1, 0)) == [11, 12]
+    assert met._value((-2, -1)) == [10]
+
+    # calculate with a Timestamp equal to the bartime but a different object, the offset seeded for it is used
+    class RecalcProbe(metric.Duplicate):
+        def _calculate(self, datetime):
+            self.seeded = self._recalc_ns == self._mdm.bartime.value
+            return super()._calculate(datetime)
+
+    probe = RecalcProbe(mdm, (in_data, 'close'))
+    datetime = pd.Timestamp('2010-05-19', tz='America/New_York')
+    assert datetime is not mdm.bartime
+    probe.calculate(datetime)
+    assert probe.seeded
+    assert probe._recalc() == 1
+
+
+def test_calculate_datetime_types():
+    in_data = rc.DataFrame(columns=['close'])
+    mdm = data.MarketDataManager(None, None)
+    met = unit_tests.UnitTest01(mdm, (in_data, 'close'))
+
+    # before the first bar there is no bartime so nothing is a recalc
+    assert mdm.bartime is None
+    assert met._recalc() == 0
+
+    # a datetime.datetime is converted to a pandas Timestamp
+    mdm.bartime = pd.Timestamp('2010-05-17', tz='America/New_York')
+    in_data.append_row(mdm.bartime, {'close': 10})
+    met.calculate(mdm.bartime.to_pydatetime())
+    assert met.data.index == [mdm.bartime]
+    assert met.data.data == [10]
+    met.calculate(mdm.bartime.to_pydatetime())  # already calculated so no change
+    assert met.data.data == [10]
+
+    mdm.bartime = pd.Timestamp('2010-05-18', tz='America/New_York')
+    in_data.append_row(mdm.bartime, {'close': 11})
+    met.calculate(mdm.bartime.to_pydatetime())
+    assert met.data.data == [10, 21]
+
+
 def test_index_slice():
     # setup
     in_data = rc.DataFrame(columns=['close'])
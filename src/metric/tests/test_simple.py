@@ -7,36 +7,52 @@ from metric.simple import Accumulate, Difference, Duplicate, Subtraction
 
 
 def assert_metric_result(mdm, metric, all_data, in_data, expected):
-    for row in all_data.iterrows():
-        datetime = row.pop('index')
+    # iterate over the index and column lists together rather than building a row object for each bar
+    columns = all_data.columns
+    for datetime, *values in zip(all_data.index, *(all_data.get_entire_column(c, as_list=True) for c in columns)):
         mdm.bartime = datetime
-        in_data.append_row(datetime, row)
+        in_data.append_row(datetime, dict(zip(columns, values)))
         metric.value(0)
     assert metric.data.data == expected
 
 
-def test_duplicate():
+@pytest.fixture(scope='module')
+def all_data():
+    # input data shared by the tests, only read and never changed
+    return rc.DataFrame({'close': [10, 9, 8]}, index=pd.date_range('2010-01-01', freq='1D', periods=3).tolist())
+
+
+def test_duplicate(all_data):
     mdm = data.MarketDataManager(None, None)
-    all_data = rc.DataFrame({'close': [10, 9, 8]}, index=pd.date_range('2010-01-01', freq='1D', periods=3).tolist())
     in_data = rc.DataFrame(columns=['close'])
 
     met = Duplicate(mdm, (in_data, 'close'))
     assert_metric_result(mdm, met, all_data, in_data, [10, 9, 8])
 
+    # fully slotted, no instance dict
+    assert not hasattr(met, '__dict__')
+
 
-def test_accumulate():
+def test_accumulate(all_data):
     mdm = data.MarketDataManager(None, None)
-    all_data = rc.DataFrame({'close': [10, 9, 8]}, index=pd.date_range('2010-01-01', freq='1D', periods=3).tolist())
     in_data = rc.DataFrame(columns=['close'])
 
     met = Accumulate(mdm, (in_data, 'close'))
     assert_metric_result(mdm, met, all_data, in_data, [10, 19, 27])
 
+    # recalc of the last bar replaces the last value in the running total
+    in_data[pd.Timestamp('2010-01-03'), 'close'] = 5
+    met.calculate(mdm.bartime, force_recalc=True)
+    assert met.data.data == [10, 19, 24]
+
+    mdm.bartime = pd.Timestamp('2010-01-04')
+    in_data.append_row(pd.Timestamp('2010-01-04'), {'close': 1})
+    assert met[0] == 25
+
 
-def test_compound():
+def test_compound(all_data):
     # Test a metric of a metric
     mdm = data.MarketDataManager(None, None)
-    all_data = rc.DataFrame({'close': [10, 9, 8]}, index=pd.date_range('2010-01-01', freq='1D', periods=3).tolist())
     in_data = rc.DataFrame(columns=['close'])
 
     dup = Duplicate(mdm, (in_data, 'close'))
@@ -45,9 +61,8 @@ def test_compound():
     assert_metric_result(mdm, met1, all_data, in_data, [10, 29, 56])
 
 
-def test_subtract():
+def test_subtract(all_data):
     mdm = data.MarketDataManager(None, None)
-    all_data = rc.DataFrame({'close': [10, 9, 8]}, index=pd.date_range('2010-01-01', freq='1D', periods=3).tolist())
     in_data = rc.DataFrame(columns=['close'])
 
     dup = Duplicate(mdm, (in_data, 'close'))
@@ -136,6 +136,31 @@ class EventProcessor:
         # confirm there are no stuck orders anywhere
         self.check_stuck_orders()
 
+    def advance_to(self, bartime, product_types, frequency):
+        """
+        Set the bartime on the MarketDataManager and process the bar
+
+        :param bartime: bartime as pandas Timestamp
+        :param product_types: list of product_types
+        :param frequency: frequency in standard format
+        :return: nothing
+        """
+        self._market_data_manager.bartime = bartime
+        self.process_bar(product_types, frequency)
+
+    def advance_many(self, bartimes, product_types, frequency):
+        """
+        Set the bartime and process the bar for each bartime in order. Does not run any of the market open or close
+        events, use only for bars inside of a single trading day.
+
+        :param bartimes: iterator of pandas Timestamps
+        :param product_types: list of product_types
+        :param frequency: frequency in standard format
+        :return: nothing
+        """
+        for bartime in bartimes:
+            self.advance_to(bartime, product_types, frequency)
+
     def market_open(self, product_types):
         """
         Run the market open process. The datetime is the current bartime in the MarketDataManager
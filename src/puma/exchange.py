@@ -65,6 +65,20 @@ class PaperExchange(Exchange):
     def live_frequency(self, frequency):
         self._live_frequency = frequency
 
+    def reset(self, live_frequency=None):
+        """
+        Clear all open and closed orders so the exchange can be reused without constructing a new object. The order
+        and fill IDs are not reset so that IDs remain unique across resets.
+
+        :param live_frequency: new live frequency, if None then the current live frequency is kept
+        :return: nothing
+        """
+        log.info(f"PaperExchange reset: {self}")
+        self._open_orders.clear()
+        self._closed_orders.clear()
+        if live_frequency is not None:
+            self._live_frequency = live_frequency
+
     def _set_parameters(self, parameters):
         # set default values
         self._parameters['fill_multiplier'] = 0.5
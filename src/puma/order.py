@@ -110,6 +110,9 @@ class Order:
                  '_state', '_closed', '_replaces_df', '_portfolio_uuid', '_portfolio_id', '_broker_order_id',
                  '_exchange_order_id', '_fill_price', '_fill_quantity', '_fills_df', '_commission', '_booked', '_type')
 
+    # the attributes in to_dict(), the state, fills and replaces history DataFrames are not included
+    _dict_slots = tuple(x for x in __slots__ if x not in ('_state_df', '_fills_df', '_replaces_df'))
+
     def __init__(self, originator_uuid, originator_id, strategy_uuid, strategy_id, product_type, symbol, buy_sell,
                  quantity, order_type, **kwargs):
         """
@@ -440,10 +443,8 @@ class Order:
         :return: dict of the object attributes
         """
         res = {}
-        for key in self.__slots__:
-            if key not in ['_state_df', '_fills_df', '_replaces_df']:
-                value = self.__getattribute__(key)
-                res[key.lstrip('_')] = value
+        for key in self._dict_slots:
+            res[key.lstrip('_')] = self.__getattribute__(key)
 
         for x in range(len(self._state_df)):
             res[self._state_df.get_cell(x, 'state')] = self._state_df.get_cell(x, 'timestamp')
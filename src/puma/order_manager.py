@@ -211,6 +211,46 @@ class OrderManager:
             filters.update(filter_dict)
         return self.orders_df(filters)
 
+    def _orders_view(self, columns, filter_dict=None):
+        """
+        Return a DataFrame of only the requested order properties for a given filter. Only the requested columns are
+        pulled from the Order objects, the full dict of each order is not created. The columns are the same as in
+        orders_df: the order attributes of Order.to_dict() and the state timestamps. If any of the columns are state
+        timestamps then falls back to orders_df.
+
+        :param columns: list of column names
+        :param filter_dict: a dictionary of filters, see orders_df
+        :return: raccoon DataFrame
+        """
+        attribute_columns = [x.lstrip('_') for x in tw_order.Order._dict_slots]
+        unknown = [x for x in columns if x not in attribute_columns and x not in tw_order.allowable_states()]
+        if unknown:
+            raise ValueError(f'columns are not order attributes or states: {unknown}')
+        if any(x not in attribute_columns for x in columns):
+            order_df = self.orders_df(filter_dict)
+            return order_df[columns] if len(order_df) else order_df
+
+        orders = sorted(self.orders_list(filter_dict), key=lambda x: x.create_timestamp)
+        if not orders:
+            return rc.DataFrame()
+        attributes = ['_' + x for x in columns]
+        values = zip(*([getattr(order, x) for x in attributes] for order in orders))
+        return rc.DataFrame(dict(zip(columns, map(list, values))), columns=list(columns), sort=True)
+
+    def open_orders_view(self, columns, filter_dict=None):
+        """
+        Returns a DataFrame of the open orders with only the requested columns. Equivalent to
+        open_orders_df(filter_dict)[columns] but only materializes the requested columns.
+
+        :param columns: list of column names
+        :param filter_dict: a dictionary of filters, see open_orders_df
+        :return: raccoon DataFrame
+        """
+        filters = {'state': tw_order.states()['open']}
+        if filter_dict:
+            filters.update(filter_dict)
+        return self._orders_view(columns, filters)
+
     def to_be_booked_list(self):
         """
         Returns a list of order objects that are in a state that they need to be booked by the PositionManager but have
@@ -125,6 +125,23 @@ class PositionManager:
         except ValueError:
             return None
 
+    def get_values(self, strategy_id, product_type, symbol, columns):
+        """
+        Returns the values for a given strategy_id and symbol for a list of columns with a single row lookup
+
+        :param strategy_id: strategy id
+        :param product_type: product type
+        :param symbol: symbol name
+        :param columns: list of column names in positions_df
+        :return: dict of {column: value}, if the index does not exist all values are None
+        """
+        try:
+            values = self._positions_df.get_columns(index=(strategy_id, product_type, symbol), columns=columns,
+                                                    as_dict=True)
+        except ValueError:
+            return {column: None for column in columns}
+        return {column: values[column] for column in columns}
+
     def set_value(self, strategy_id, product_type, symbol, column, value):
         """
         Set the cell value for a given strategy_id and symbol for a column
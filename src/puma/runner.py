@@ -2,11 +2,14 @@
 The outermost class that runs the entire system
 """
 
+import datetime
+import functools
 import importlib
 import logging
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
 
+import numpy as np
 import pandas as pd
 
 import database.utils as dbutils
@@ -20,6 +23,22 @@ from database import tapdb, strategydb, metadb
 log = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=32)
+def _bartimes_impl(markets, frequency, start_date, end_date, include_open):
+    """
+    Cached full-day bartimes for the markets between the start and end dates, with the actual close times. The
+    arguments must be hashable so the markets are passed in as a tuple and the dates as tz-naive midnight Timestamps.
+
+    :param markets: tuple of markets
+    :param frequency: frequency in standard string format
+    :param start_date: start date
+    :param end_date: end date
+    :param include_open: if True then include the open time as a bar
+    :return: DatetimeIndex
+    """
+    return mdatetime.bartimes(list(markets), frequency, start_date, end_date, include_open)
+
+
 class RunnerBase(metaclass=ABCMeta):
     """
     Runner Abstract Base Class
@@ -111,9 +130,26 @@ class RunnerBase(metaclass=ABCMeta):
         :param default_close: if True then use the default close time for 1D data, if False use actual close time
         :return: iterator of DateTimes
         """
-        return mdatetime.bartimes(
-            self.product_types(), self.min_frequency(), start_datetime, end_datetime, include_open, default_close
-        )
+        # the calendar is generated for whole days and cached, then sliced for the start and end times. As in
+        # mdatetime.bartimes() the default close times are applied after the cut, so an early close bar is cut by the
+        # actual close time
+        markets = self.product_types()
+        frequency = self.min_frequency()
+        datetimes = _bartimes_impl(tuple(markets), frequency, start_datetime.tz_localize(None).normalize(),
+                                   end_datetime.tz_localize(None).normalize(), include_open)
+        start, end = 0, len(datetimes)
+        if start_datetime.time() != datetime.time(0, 0):
+            if not start_datetime.tz:
+                raise ValueError("start_datetime must have a time zone")
+            start = datetimes.searchsorted(start_datetime, side='left')
+        if end_datetime.time() != datetime.time(0, 0):
+            if not end_datetime.tz:
+                raise ValueError("end_datetime must have a time_zone")
+            end = datetimes.searchsorted(end_datetime, side='right')
+        datetimes = datetimes[start:end]
+        if default_close & (frequency == "1D"):
+            datetimes = mdatetime.apply_default_close(datetimes, markets)
+        return datetimes
 
     @abstractmethod
     def run(self, bartimes):
@@ -370,23 +406,28 @@ class SimRunner(RunnerBase):
 
         product_types = self.product_types()
         log.info("beginning run from {} to {} at frequency {}".format(bartimes[0], bartimes[-1], frequency))
-        prior_bar = None
-        for bartime in bartimes:
+        # flag the first bar of each new day up front with numpy rather than comparing dates bar by bar
+        days = pd.DatetimeIndex(bartimes).normalize().asi8
+        new_days = np.zeros(len(days), dtype=bool)
+        new_days[1:] = days[1:] > days[:-1]
+
+        market_data_manager = self._market_data_manager
+        event_looper = self._event_looper
+        for i, (bartime, new_day) in enumerate(zip(bartimes, new_days)):
             log.info(f"running bar: {bartime}")
-            if prior_bar is None:  # first bar in the run
-                self._market_data_manager.bartime = bartime
-                self._event_looper.begin_of_day()
-                self._event_looper.market_open(product_types)
-            elif bartime.date() > prior_bar.date():  # first bar of a new day
-                self._event_looper.market_close(product_types)
-                self._event_looper.end_of_day(product_types)
-                self._market_data_manager.bartime = bartime
-                self._event_looper.begin_of_day()
-                self._event_looper.market_open(product_types)
+            if i == 0:  # first bar in the run
+                market_data_manager.bartime = bartime
+                event_looper.begin_of_day()
+                event_looper.market_open(product_types)
+            elif new_day:  # first bar of a new day
+                event_looper.market_close(product_types)
+                event_looper.end_of_day(product_types)
+                market_data_manager.bartime = bartime
+                event_looper.begin_of_day()
+                event_looper.market_open(product_types)
             else:
-                self._market_data_manager.bartime = bartime
-            self._event_looper.process_bar(product_types, frequency)
-            prior_bar = bartime
+                market_data_manager.bartime = bartime
+            event_looper.process_bar(product_types, frequency)
         # After all bars have been run execute stop
         self._event_looper.stop()
         # call the exit method
@@ -38,6 +38,30 @@ def test_initialize():
     assert_frame_equal(pe.closed_orders_df, rc.DataFrame())
 
 
+def test_reset():
+    pe = exchange.PaperExchange()
+    order_id = pe.receive_order('stock', 'test.sym.3', 'sell', 30, 'LIMIT', price=10.10)
+    pe.cancel_order(pe.get_order(order_id), pd.Timestamp('2010-01-04 09:30', tz='America/New_York'))
+    pe.receive_order('stock', 'test.sym.3', 'buy', 10, 'LIMIT', price=10.00)
+    assert len(pe.open_orders_list) == 1
+    assert len(pe.closed_orders_list) == 1
+
+    # reset without changing the live frequency
+    pe.reset()
+    assert pe.live_frequency == '1min'
+    assert_frame_equal(pe.open_orders_df, rc.DataFrame())
+    assert_frame_equal(pe.closed_orders_df, rc.DataFrame())
+
+    # order IDs keep incrementing after reset
+    new_order_id = pe.receive_order('stock', 'test.sym.3', 'sell', 30, 'LIMIT', price=10.10)
+    assert new_order_id == order_id + 2
+
+    # reset and change the live frequency
+    pe.reset(live_frequency='5min')
+    assert pe.live_frequency == '5min'
+    assert pe.open_orders_list == []
+
+
 def test_set_parameters():
     params = {'fill_multiplier': 0.25}
     paper_ex = exchange.PaperExchange(parameters=params)
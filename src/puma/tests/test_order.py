@@ -4,6 +4,7 @@ unit tests for Order() class
 
 from unittest import mock
 
+import numpy as np
 import pandas as pd
 import pytest
 import raccoon as rc
@@ -121,6 +122,10 @@ def test_initialize():
     assert od.type == 'MARKET'
     assert od.details == {}
 
+    # symbols from pandas or numpy are numpy strings
+    od = order.Order(1001, 'orig_1', 123, 'test_id', 'stock', np.str_('TEST'), 'B', 1000, 'LIMIT', price=99.99)
+    assert od.symbol == 'TEST'
+
 
 # noinspection PyPropertyAccess
 def test_immutable_attributes():
@@ -228,6 +228,39 @@ def test_order_dfs():
     assert_frame_equal(actual, expected)
 
 
+def test_open_orders_view():
+    om = order_manager.OrderManager('unit_test', None)
+    assert len(om.open_orders_view(['symbol', 'quantity'])) == 0
+
+    order1 = tw.Order('001-001', 'orig_01', '123-456', 'stat_id', 'stock', 'TEST', 'buy', 75, 'LIMIT', price=40)
+    order1.state = 'STAGED'
+    om.new_order(order1)
+    order2 = tw.Order('001-001', 'orig_01', '123-456', 'stat_id', 'future', 'TEST', 'sell', 5, 'LIMIT', price=4)
+    order2.state = 'STAGED'
+    om.new_order(order2)
+    order3 = tw.Order('001-001', 'orig_01', '123-456', 'stat_id', 'stock', 'TEST', 'sell', 55, 'LIMIT', price=400)
+    order3.state = 'FILLED'
+    om.new_order(order3)
+
+    # matches the projection of open_orders_df
+    columns = ['symbol', 'state', 'buy_sell', 'quantity', 'details', 'closed']
+    expected = om.open_orders_df()[columns]
+    assert_frame_equal(om.open_orders_view(columns), expected)
+
+    # with a filter
+    expected = om.open_orders_df({'product_type': 'future'})[columns]
+    assert_frame_equal(om.open_orders_view(columns, {'product_type': 'future'}), expected)
+
+    # state timestamp columns fall back to open_orders_df
+    expected = om.open_orders_df()[['symbol', 'STAGED']]
+    assert_frame_equal(om.open_orders_view(['symbol', 'STAGED']), expected)
+
+    # the private history DataFrames and unknown columns are not available
+    for column in ['state_df', 'fills_df', 'replaces_df', 'bad_column']:
+        with pytest.raises(ValueError):
+            om.open_orders_view(['symbol', column])
+
+
 def test_change_state():
     om = order_manager.OrderManager('unit_test', None)
     assert len(om.open_orders_df()) == 0
@@ -260,6 +260,19 @@ def test_get_value():
     assert pm.get_value('test-id', 'stock', 'BADSYM', 'current_position') is None
 
 
+def test_get_values():
+    oms = tw.OrderManager('unit_test', None)
+    pm = position_manager.PositionManager('testpm', oms, None)
+
+    pm.enter_trade('orig-id', 'test-id', pd.Timestamp('2010-01-05 13:04:00', tz=NYC), 'stock', 'TEST', 'buy', 100, 50)
+    assert pm.get_values('test-id', 'stock', 'TEST', ['current_position', 'buy_quantity', 'sell_quantity']) == \
+           {'current_position': 100, 'buy_quantity': 100, 'sell_quantity': 0}
+
+    # test that asking for an index that does not exist returns None for all columns
+    assert pm.get_values('test-id', 'stock', 'BADSYM', ['current_position', 'buy_quantity']) == \
+           {'current_position': None, 'buy_quantity': None}
+
+
 def test_enter_trade():
     oms = tw.OrderManager('unit_test', None)
     pm = position_manager.PositionManager('testpm', oms, None)
@@ -575,6 +575,25 @@ def test_process_bar():
     assert tap.get_value('test.example', 'stock', 'MSFT', 'net_quantity') == 0
 
 
+def test_advance_to():
+    # same bars as test_process_bar, using advance_to and advance_many
+    broker, exchange, oms, tap, mdm, strat, port, risk = setup_objects_csv()
+    event_loop = tw.EventProcessor([strat], [port], risk, oms, tap, broker, mdm, exchange)
+    oms.market_state('stock', True)
+
+    event_loop.advance_to(pd.Timestamp('2010-01-01 09:30:00', tz=default_time_zone), ['stock'], '1min')
+    assert mdm.bartime == pd.Timestamp('2010-01-01 09:30:00', tz=default_time_zone)
+    assert len(oms.open_orders_df()) == 2
+    assert len(oms.closed_orders_df()) == 1
+
+    bartimes = pd.date_range('2010-01-01 09:31:00', '2010-01-01 09:33:00', freq='1min', tz=default_time_zone)
+    event_loop.advance_many(bartimes, ['stock'], '1min')
+    assert mdm.bartime == bartimes[-1]
+    assert tap.get_value('test.example', 'stock', 'MSFT', 'buy_quantity') == 50
+    assert tap.get_value('test.example', 'stock', 'MSFT', 'sell_quantity') == 50
+    assert tap.get_value('test.example', 'stock', 'MSFT', 'net_quantity') == 0
+
+
 def test_multi_portfolios():
     # setup all the environment objects
     oms = tw.OrderManager('unit_test', None)
@@ -14,6 +14,7 @@ from raccoon.utils import assert_frame_equal
 from sqlalchemy import Engine
 
 import data as datalib
+import data.datetime as mdatetime
 import database.utils as dbutils
 import metric as metric
 import puma as tw
@@ -230,6 +231,35 @@ def test_bartimes_daily():
     simrun.exit()
 
 
+def test_bartimes_default_close():
+    simrun = runner.SimRunner(host="temp")
+    simrun.setup_market_data(data_feed="CsvDataFeed", directory=data_dir)
+    simrun.add_strategies(
+        rc.DataFrame(
+            {
+                "module_name": "puma.strategy",
+                "class_name": "ExampleStrategy",
+                "strategy_id": "test_01",
+                "portfolio_id": "port_01",
+            }
+        )
+    )
+    symbols = pd.DataFrame(
+        {"strategy_id": ["test_01"], "product_type": ["stock"], "symbol_name": ["test.sym.1"], "frequency": ["1D"]}
+    )
+    simrun.add_symbols(symbols)
+
+    # 2010-11-26 is an early close at 13:00, so an end time of 14:00 keeps that bar before it is moved to 16:00
+    start = pd.Timestamp("2010-11-22")
+    end = pd.Timestamp("2010-11-26 14:00", tz=NYC)
+    for default_close in [True, False]:
+        expected = mdatetime.bartimes("stock", "1D", start, end, include_open=False, default_close=default_close)
+        actual = simrun.bartimes(start, end, include_open=False, default_close=default_close)
+        assert_index_equal(actual, expected)
+        assert actual[-1].tz_convert(NYC).date() == end.date()
+    simrun.exit()
+
+
 def test_bartimes_minute():
     simrun = runner.SimRunner(host="temp")
     simrun.setup_market_data(data_feed="CsvDataFeed", directory=data_dir)
@@ -272,6 +302,14 @@ def test_bartimes_minute():
     )
     assert_index_equal(actual, expected)
 
+    # Same day with a different end time is sliced from the cached calendar
+    hits = runner._bartimes_impl.cache_info().hits
+    actual = simrun.bartimes(
+        pd.Timestamp("1991-01-02 09:30:00", tz=NYC), pd.Timestamp("1991-01-02 09:31:00", tz=NYC), include_open=False
+    )
+    assert_index_equal(actual, expected[:1])
+    assert runner._bartimes_impl.cache_info().hits == hits + 1
+
     # Error out if no time zone on the start_datetime or end_datetime
     with pytest.raises(ValueError):
         simrun.bartimes(pd.Timestamp("1991-01-02 09:30:00"), pd.Timestamp("1991-01-02 09:32:00", tz=NYC))
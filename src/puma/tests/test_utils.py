@@ -118,3 +118,11 @@ def test_assert_positions_df():
     # this will fail because quantity in the csv file does not match the TAPDB values
     with pytest.raises(AssertionError):
         twutils.assert_positions_df(temp_tapdb, inst_dir, "test_unit", date)
+
+    # the expected DataFrame is a copy, changing it does not change the cached one used by later asserts
+    filename = str(inst_dir / "test_unit_positions_df_2010-01-04_16-00-00.csv")
+    expected = twutils._expected_positions_df(filename)
+    expected.set_column(column="current_position", values=-1)
+    assert twutils._expected_positions_df(filename).get_entire_column("current_position", as_list=True) == [50]
+    date = pd.Timestamp("2010-01-04 16:00", tz="America/New_York")
+    twutils.assert_positions_df(temp_tapdb, inst_dir, "test_unit", date)
@@ -2,6 +2,8 @@
 Tomahawk utilities
 """
 
+import copy
+import functools
 import os
 import sys
 from pathlib import Path
@@ -9,6 +11,7 @@ from typing import Union
 
 import numpy as np
 import pandas as pd
+import raccoon as rc
 from numpy.testing import assert_almost_equal
 from raccoon.utils import assert_frame_equal
 
@@ -62,6 +65,38 @@ def assert_orders_equal(order_left, order_right, check_state=True, check_state_d
         assert_frame_equal(order_left.replaces, order_right.replaces)
 
 
+@functools.lru_cache(maxsize=32)
+def _read_expected_positions_df(filename: str, mtime: float) -> rc.DataFrame:
+    """
+    Load the frozen positions_df csv file. The results are cached, the file modified time is part of the cache key so
+    that if the file changes it will be re-loaded. The cache is bounded so the least recently read files are dropped.
+    The returned DataFrame is shared, use _expected_positions_df() for a copy.
+
+    :param filename: full path of the csv file
+    :param mtime: modified time of the file
+    :return: raccoon DataFrame
+    """
+    expected = pd.read_csv(filename, index_col="('strategy_id', 'product_type', 'symbol')")
+    expected = expected.replace(np.nan, None)
+    # convert the index from string to tuple
+    expected = pdutils.pd_to_rc(expected)
+    # index tuples get loaded as strings, turn into tuples
+    expected.index_name = eval(expected.index_name)
+    expected.index = [eval(x) for x in expected.index]
+    expected.sort = True
+    return expected
+
+
+def _expected_positions_df(filename: str) -> rc.DataFrame:
+    """
+    Copy of the cached frozen positions_df csv file, so the caller can change it without changing the cache.
+
+    :param filename: full path of the csv file
+    :return: raccoon DataFrame
+    """
+    return copy.deepcopy(_read_expected_positions_df(filename, os.path.getmtime(filename)))
+
+
 def assert_positions_df(engine, directory: str | Path, source: str, datetime: Union[str, pd.Timestamp]) -> None:
     """
     Assert function to test the persisted positions_df DataFrames that are stored in TAPDB with frozen csv files.
@@ -80,14 +115,7 @@ def assert_positions_df(engine, directory: str | Path, source: str, datetime: Un
 
     # load expected from file
     filename = os.path.join(directory, source + '_positions_df_' + datetime_str + '.csv')
-    expected = pd.read_csv(filename, index_col="('strategy_id', 'product_type', 'symbol')")
-    expected = expected.replace(np.nan, None)
-    # convert the index from string to tuple
-    expected = pdutils.pd_to_rc(expected)
-    # index tuples get loaded as strings, turn into tuples
-    expected.index_name = eval(expected.index_name)
-    expected.index = [eval(x) for x in expected.index]
-    expected.sort = True
+    expected = _expected_positions_df(filename)
 
     # get actual from database
     actual = tapdb.get_positions_df(engine, source, datetime)
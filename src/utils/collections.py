@@ -107,6 +107,39 @@ def aggregate_rc(df, index_name, operator):
     return rc.DataFrame(values, columns=df.columns, index=new_index, index_name=index_name, sort=df.sort)
 
 
+def aggregate_rc_fast(df, index_name):
+    """
+    Sums the values from a DataFrame that has a tuple index, grouped by one element of the index tuple. Same results as
+    aggregate_rc(df, index_name, sum) but the grouping and sums are done in numpy. All columns must be numeric, bool
+    and integer columns are summed as int64 and float columns as float64 so the sums do not wrap or become a logical OR.
+
+    :param df: input DataFrame
+    :param index_name: the name of the index tuple element to aggregate by
+    :return: raccoon DataFrame
+    """
+    index_slot = df.index_name.index(index_name)
+    keys = np.empty(len(df.index), dtype=object)
+    keys[:] = [x[index_slot] for x in df.index]
+    unique_keys, first_locations, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # np.unique sorts the keys, re-order to the order of first appearance to match aggregate_rc
+    order = np.argsort(first_locations)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    groups = rank[inverse]
+
+    values = {}
+    for col in df.columns:
+        column = np.asarray(df.get_entire_column(col, as_list=True))
+        if column.dtype.kind not in 'biufc':
+            raise ValueError(f'column {col} is not numeric, use aggregate_rc')
+        sums = np.zeros(len(unique_keys), dtype=np.result_type(column.dtype, np.int64))
+        np.add.at(sums, groups, column)
+        values[col] = sums.tolist()
+    return rc.DataFrame(values, columns=df.columns, index=unique_keys[order].tolist(), index_name=index_name,
+                        sort=df.sort)
+
+
 def sorted_in(list_of_elements, value):
     """
     Returns True or False if value is in list_of_elements. The list_of_elements must be sorted. This is for speed.
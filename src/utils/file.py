@@ -4,6 +4,7 @@ Helper utility functions for file operations.
 
 import datetime
 import logging
+import logging.handlers
 import os
 import shutil
 
@@ -95,13 +96,15 @@ def add_unique_postfix(filename, dash_separator=False):
     raise RuntimeError('Unable to create unique filename.')
 
 
-def setup_logging(console=True, filename=None):
+def setup_logging(console=True, filename=None, buffer_capacity=None):
     """
     Standard logging setup. To use properly this should be run at the module with the __main__ that is the top level.
     Then each imported module should have the following at the module level: log = logging.getLogger(__name__)
 
     :param console: True to output to the console, False for silent
     :param filename: filename to output log file, or None
+    :param buffer_capacity: if not None then the log file writes are buffered in memory and flushed every
+                            buffer_capacity records, or immediately on an ERROR. If None every record is written.
     :return: nothing
     """
     logger = logging.getLogger()
@@ -119,10 +122,15 @@ def setup_logging(console=True, filename=None):
         fh = logging.FileHandler(filename)
         fh.setLevel(logging.DEBUG)
         fh.setFormatter(formatter)
-        logger.addHandler(fh)
+        if buffer_capacity:
+            mh = logging.handlers.MemoryHandler(buffer_capacity, flushLevel=logging.ERROR, target=fh)
+            mh.setLevel(logging.DEBUG)
+            logger.addHandler(mh)
+        else:
+            logger.addHandler(fh)
 
     if not (console or filename):
-        logger.addHandler(logging.NullHandler)
+        logger.addHandler(logging.NullHandler())
 
 
 def log_filename(name):
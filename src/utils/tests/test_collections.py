@@ -6,6 +6,7 @@ import statistics
 import utils.collections as cutils
 import numpy as np
 import operator
+import pytest
 import raccoon as rc
 from raccoon.utils import assert_frame_equal
 
@@ -99,6 +100,33 @@ def test_aggregate():
     assert_frame_equal(actual, expected)
 
 
+def test_aggregate_fast():
+    df = rc.DataFrame({'col_1': [1, 2, 3], 'col_2': [4.5, 5.5, 6.0]}, index=[('d', 'b'), ('a', 'b'), ('d', 'c')],
+                      index_name=('first', 'second'), sort=False)
+
+    expected = rc.DataFrame({'col_1': [4, 2], 'col_2': [10.5, 5.5]}, index=['d', 'a'], index_name='first',
+                            columns=df.columns, sort=False)
+    actual = cutils.aggregate_rc_fast(df, 'first')
+    assert_frame_equal(actual, expected)
+
+    # same results as aggregate_rc with sum
+    for index_name in ['first', 'second']:
+        assert_frame_equal(cutils.aggregate_rc_fast(df, index_name), cutils.aggregate_rc(df, index_name, sum))
+
+    # bool columns are counted, not OR'ed, and small int columns do not wrap
+    df = rc.DataFrame({'col_1': [True, True, False], 'col_2': list(np.array([100, 100, 1], dtype=np.int8))},
+                      index=[('d', 'b'), ('d', 'c'), ('a', 'c')], index_name=('first', 'second'), sort=False)
+    expected = rc.DataFrame({'col_1': [2, 0], 'col_2': [200, 1]}, index=['d', 'a'], index_name='first',
+                            columns=df.columns, sort=False)
+    assert_frame_equal(cutils.aggregate_rc_fast(df, 'first'), expected)
+    assert_frame_equal(cutils.aggregate_rc_fast(df, 'first'), cutils.aggregate_rc(df, 'first', sum))
+
+    # non-numeric columns are rejected
+    df = rc.DataFrame({'col_1': ['x', 'y']}, index=[('d', 'b'), ('a', 'b')], index_name=('first', 'second'))
+    with pytest.raises(ValueError):
+        cutils.aggregate_rc_fast(df, 'first')
+
+
 def test_sorted_in():
     assert cutils.sorted_in([1, 2, 4, 5], 2) is True
     assert cutils.sorted_in([1, 2, 4, 5], 1) is True
@@ -116,3 +116,32 @@ def test_setup_logging():
     output = list(open(filename))
     assert output[0].split('-')[-1] == ' log info output\n'
     assert output[1].split('-')[-1] == ' log warning output\n'
+
+
+def test_setup_logging_no_output():
+    # with no console and no file the root logger gets a NullHandler instance, so logging does not error
+    ufile.setup_logging(console=False, filename=None)
+    handler = logging.getLogger().handlers[-1]
+    assert isinstance(handler, logging.NullHandler)
+    logging.getLogger('logging test').info('log info output')
+    logging.getLogger().removeHandler(handler)
+
+
+def test_setup_logging_buffered():
+    filename = tempfile.gettempdir() + "/logTest_buffered_" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".txt"
+    ufile.setup_logging(False, filename=filename, buffer_capacity=10)
+    handler = logging.getLogger().handlers[-1]
+    assert isinstance(handler, logging.handlers.MemoryHandler)
+
+    log = logging.getLogger('logging test')
+    log.info('log info output')
+    assert list(open(filename)) == []  # still in the buffer
+
+    # an error flushes the buffer
+    log.error('log error output')
+    output = list(open(filename))
+    assert output[0].split('-')[-1] == ' log info output\n'
+    assert output[1].split('-')[-1] == ' log error output\n'
+
+    logging.getLogger().removeHandler(handler)
+    handler.close()